@@ -3,23 +3,31 @@ import json
 from projects.btc.keygen import run_keygen
 from projects.btc.passgen import run_passgen
 from projects.crypto.monitor import run_monitor
-from projects.stake.stake_shared import run_stake_game
+from projects.stake.stake_index import QUERY_TYPES, run_query
+from projects.stake.stake_service import SERVICE_HOST, SERVICE_PORT, run_service
+from projects.stake.stake_shared import run_stake_daemon, run_stake_game, run_stake_games
 from utils.logger import get_logger
 
 with open("config.json") as f:
     config = json.load(f)
 
-def dispatch(task, log_mode):
+def dispatch(task, log_mode, args=None):
     logger = get_logger(task, log_mode)
     logger.info(f"Running Task: {task} | Log Mode: {log_mode}")
     
     if task == "stake_task":
         mode = config["stake_task"]["mode"]
-        if mode in ("CRASH", "SLIDE"):
+        if config["stake_task"].get("daemon"):
+            modes = ["CRASH", "SLIDE"] if mode == "BOTH" else [mode]
+            run_stake_daemon(modes=modes, interval=config["stake_task"].get("interval", 30), log=logger)
+        elif mode in ("CRASH", "SLIDE"):
             run_stake_game(mode=mode, log=logger)
         elif mode == "BOTH":
-            run_stake_game(mode="CRASH", log=logger)
-            run_stake_game(mode="SLIDE", log=logger)
+            run_stake_games(modes=["CRASH", "SLIDE"], log=logger)
+    elif task == "stake_query":
+        run_query(game_type=args.game, query=args.query, threshold=args.above, start=args.start, end=args.end, days=args.days, log=logger)
+    elif task == "stake_service":
+        run_service(host=args.host, port=args.port, log=logger)
     elif task == "btc_task":
         mode = config["btc_task"]["mode"]
         if mode == "KEY":
@@ -40,5 +48,13 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="pytaskscripts runner")
     parser.add_argument("task", help="Task to run")
     parser.add_argument("--log_mode", help="Log file mode", choices=["append", "write"], default="append")
+    parser.add_argument("--game", help="stake_query: game to query", choices=["crash", "slide"], default="crash")
+    parser.add_argument("--query", help="stake_query: query type", choices=QUERY_TYPES, default="last")
+    parser.add_argument("--above", help="stake_query: multiplier level", type=float, default=2.0)
+    parser.add_argument("--start", help="stake_query: range start (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)")
+    parser.add_argument("--end", help="stake_query: range end (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)")
+    parser.add_argument("--days", help="stake_query: only the last N days before --end or the latest round", type=float)
+    parser.add_argument("--host", help="stake_service: bind address", default=SERVICE_HOST)
+    parser.add_argument("--port", help="stake_service: port", type=int, default=SERVICE_PORT)
     args = parser.parse_args()
-    dispatch(args.task, args.log_mode)
\ No newline at end of file
+    dispatch(args.task, args.log_mode, args)
\ No newline at end of file
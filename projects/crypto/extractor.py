@@ -0,0 +1,61 @@
+import json
+
+POST_LIMIT = 10
+
+POST_SELECTORS = {
+    'twitter': "[data-testid='tweetText']",
+    'truth_social': "div.status__content-wrapper"
+}
+
+TWITTER_EXTRACT_SCRIPT = """
+const limit = arguments[0];
+const nodes = Array.from(document.querySelectorAll(arguments[1]));
+const posts = nodes.slice(0, limit).map((node) => {
+    const article = node.closest("article");
+    const time = article ? article.querySelector("time") : null;
+    const link = time ? time.closest("a[href*='/status/']") : null;
+    const permalink = link ? link.href : null;
+    const match = permalink ? permalink.match(/\\/status\\/(\\d+)/) : null;
+    return {
+        id: match ? match[1] : null,
+        permalink: permalink,
+        timestamp: time ? time.getAttribute("datetime") : null,
+        text: node.innerText
+    };
+});
+return JSON.stringify({count: nodes.length, posts: posts});
+"""
+
+TRUTH_SOCIAL_EXTRACT_SCRIPT = """
+const limit = arguments[0];
+const nodes = Array.from(document.querySelectorAll(arguments[1]));
+const posts = nodes.slice(0, limit).map((node) => {
+    let paragraphs = Array.from(node.querySelectorAll("p"));
+    if (paragraphs.length > 3) {
+        paragraphs = paragraphs.slice(0, -3);
+    }
+    const status = node.closest("[data-id]");
+    const container = node.closest("div.status") || status || node.parentElement;
+    const time = container ? container.querySelector("time") : null;
+    const link = container ? container.querySelector("a[href*='/posts/']") : null;
+    const permalink = link ? link.href : null;
+    const match = permalink ? permalink.match(/\\/posts\\/(\\d+)/) : null;
+    return {
+        id: status ? status.getAttribute("data-id") : (match ? match[1] : null),
+        permalink: permalink,
+        timestamp: time ? (time.getAttribute("datetime") || time.getAttribute("title")) : null,
+        text: paragraphs.map((p) => p.innerText.trim()).filter((text) => text).join(" ")
+    };
+});
+return JSON.stringify({count: nodes.length, posts: posts});
+"""
+
+EXTRACT_SCRIPTS = {
+    'twitter': TWITTER_EXTRACT_SCRIPT,
+    'truth_social': TRUTH_SOCIAL_EXTRACT_SCRIPT
+}
+
+
+def extract_posts(driver, site, limit=POST_LIMIT):
+    result = json.loads(driver.execute_script(EXTRACT_SCRIPTS[site], limit, POST_SELECTORS[site]) or '{}')
+    return result.get('count', 0), result.get('posts', [])
@@ -0,0 +1,65 @@
+import os
+import re
+import threading
+
+
+def build_keyword_pattern(keywords):
+    alternatives = sorted({keyword.lower() for keyword in keywords}, key=lambda keyword: (-len(keyword), keyword))
+    if not alternatives:
+        return None
+    body = '|'.join(r'\s+'.join(re.escape(part) for part in keyword.split()) for keyword in alternatives)
+    return re.compile(rf'(?<!\w)(\$)?({body})(?!\w)', re.IGNORECASE)
+
+
+class KeywordMatcher:
+    def __init__(self, keywords=None, keywords_file=None):
+        self.default_keywords = list(keywords or [])
+        self.keywords_file = keywords_file
+        self.keywords_mtime = None
+        self.lock = threading.Lock()
+        self.keywords = []
+        self.lookup = {}
+        self.pattern = None
+        self.build(self.load_keywords())
+
+    def load_keywords(self):
+        if not self.keywords_file or not os.path.exists(self.keywords_file):
+            self.keywords_mtime = None
+            return self.default_keywords
+        self.keywords_mtime = os.stat(self.keywords_file).st_mtime_ns
+        with open(self.keywords_file, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+    def build(self, keywords):
+        keywords = [' '.join(keyword.split()) for keyword in keywords if keyword.strip()]
+        pattern = build_keyword_pattern(keywords)
+        with self.lock:
+            self.keywords = keywords
+            self.lookup = {keyword.lower(): keyword for keyword in keywords}
+            self.pattern = pattern
+
+    def reload_if_changed(self):
+        mtime = os.stat(self.keywords_file).st_mtime_ns if self.keywords_file and os.path.exists(self.keywords_file) else None
+        if mtime == self.keywords_mtime:
+            return False
+        self.build(self.load_keywords())
+        return True
+
+    def find(self, text):
+        with self.lock:
+            pattern = self.pattern
+            lookup = self.lookup
+        if pattern is None:
+            return []
+        matches = []
+        for match in pattern.finditer(text):
+            key = ' '.join(match.group(2).lower().split())
+            matches.append((lookup.get(key, key), match.start(), match.end(), bool(match.group(1))))
+        return matches
+
+    def keywords_in(self, text):
+        found = []
+        for keyword, _, _, _ in self.find(text):
+            if keyword not in found:
+                found.append(keyword)
+        return found
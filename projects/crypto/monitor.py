@@ -1,14 +1,16 @@
 import logging
-import os, re, time, smtplib
+import os, time, smtplib, threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import StaleElementReferenceException, NoSuchElementException
+from projects.crypto.extractor import POST_LIMIT, POST_SELECTORS, extract_posts
+from projects.crypto.matcher import KeywordMatcher
+from projects.crypto.post_store import PostStore
+from projects.crypto.waiter import SCROLL_TIMEOUT, AdaptiveWaiter
 
 logger = logging.getLogger("null")
 logger.addHandler(logging.NullHandler())
@@ -16,11 +18,16 @@ logger.addHandler(logging.NullHandler())
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 FOUND_POSTS_FILE = os.path.join(DATA_DIR, 'found_posts.txt')
+FOUND_POSTS_LOG = os.path.join(DATA_DIR, 'found_posts.bin')
+KEYWORDS_FILE = os.path.join(DATA_DIR, 'keywords.txt')
+WAIT_TIMES_FILE = os.path.join(DATA_DIR, 'wait_times.json')
 
 EMAIL_ENABLED = True
 SMS_ENABLED = True
 DEBUG_ENABLED = True
 CHECK_CARRIER = False
+SCAN_WORKERS = 3
+SITE_LIMITS = {'truth_social': 2, 'twitter': 2}
 
 CRYPTO_KEYWORDS = [
     "cryptocurrency", "bitcoin", "btc", "ltc", "ethereum", "eth", "litecoin","dogecoin", "shiba inu", "floki", "pepe", "dogwifhat",
@@ -59,7 +66,11 @@ EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD', '')
 EMAIL_SERVER = os.getenv('EMAIL_SERVER', '')
 BROWSER_TYPE = os.getenv('BROWSER_TYPE', '')
 
-LOADED_POSTS = set()
+LOADED_POSTS = PostStore(FOUND_POSTS_LOG)
+KEYWORD_MATCHER = KeywordMatcher(CRYPTO_KEYWORDS, KEYWORDS_FILE)
+ALERT_LOCK = threading.Lock()
+WORKER_STATE = threading.local()
+PAGE_WAITER = AdaptiveWaiter(WAIT_TIMES_FILE)
 
 def setup_browser():
     global logger
@@ -97,94 +108,77 @@ def setup_browser():
         logger.warning(f"Unknown {BROWSER_TYPE} driver.")
     return None
 
-def check_for_keywords(text):
+def check_for_keywords(text, post_id=None):
     global logger
-    global LOADED_POSTS, CRYPTO_KEYWORDS, DEBUG_ENABLED
-    found_keywords = []
-    if text in LOADED_POSTS:
+    global LOADED_POSTS, KEYWORD_MATCHER, DEBUG_ENABLED
+    if LOADED_POSTS.seen(post_id, text):
         if DEBUG_ENABLED:
             logger.info(f"~~~~~ FOUND IN LOADED_POSTS ~~~~~")
-        return found_keywords
-    for keyword in CRYPTO_KEYWORDS:
-        if re.search(rf'(?<!\w){re.escape(keyword)}(?!\w)', text, re.IGNORECASE):
-            found_keywords.append(keyword)
-    return found_keywords
+        return []
+    return KEYWORD_MATCHER.keywords_in(text)
+
+def reload_keywords():
+    global KEYWORD_MATCHER, logger
+    try:
+        if KEYWORD_MATCHER.reload_if_changed():
+            logger.info(f"Reloaded {len(KEYWORD_MATCHER.keywords)} keywords")
+    except Exception as e:
+        logger.error(f"Error reloading keywords: {e}")
+
+def check_posts(item, posts, url_link):
+    global DEBUG_ENABLED, logger
+    for index, post in enumerate(posts):
+        post_text = normalize_text(post['text'] or '')
+        if not post_text:
+            logger.warning(f"No text found in post {index + 1} by {item[0]}")
+            continue
+        found_keywords = check_for_keywords(post_text, post['id'])
+        if found_keywords:
+            alert_event(item, found_keywords, post_text, post['permalink'] or url_link, post['id'])
+        elif DEBUG_ENABLED:
+            logger.info(f"NO MATCH FOUND IN ---->  {post_text}")
 
 def check_twitter_account(driver, item):
     global logger
-    global DEBUG_ENABLED
     logger.info(f"Checking Twitter account: {item[0]}")
     url_link = f"https://twitter.com/{item[0]}"
     try:
-        driver.get(url_link)
-        WebDriverWait(driver, 8).until(EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='tweetText']")))
-        time.sleep(2)
-        scroll_down(driver, scrolls=1, scroll_height=500)
-        tweets = driver.find_elements(By.CSS_SELECTOR, "[data-testid='tweetText']")
-        if tweets:
-            logger.info(f"Account: {item[0]} has {len(tweets)} posts found.")
+        load_posts(driver, 'twitter', item, url_link)
+        count, posts = extract_posts(driver, 'twitter')
+        if count:
+            logger.info(f"Account: {item[0]} has {count} posts found.")
         else:
             logger.warning(f"No posts found on the {item[0]} page!")
-        for tweet in tweets[:10]:
-            try:
-                post_text = tweet.text
-                post_text = normalize_text(post_text)
-                found_keywords = check_for_keywords(post_text)
-                if found_keywords:
-                    alert_event(item, found_keywords, post_text, url_link)
-                elif DEBUG_ENABLED:
-                    logger.info(f"NO MATCH FOUND IN ---->  {post_text}")
-            except Exception as e:
-                logger.error(f"Error processing tweet: {e}")
+        check_posts(item, posts, url_link)
     except Exception as e:
         logger.error(f"Error checking Twitter account {item[0]}: {e}")
 
 
 def check_truth_social_account(driver, item):
-    global DEBUG_ENABLED, logger
+    global logger
     logger.info(f"Checking Truth Social account: {item[0]}")
     url_link = f"https://truthsocial.com/@{item[0]}"
     try:
-        driver.get(url_link)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "timeline")))
-        time.sleep(2)
-        scroll_down(driver, scrolls=1, scroll_height=500)
-        posts = driver.find_elements(By.CSS_SELECTOR, "div.status__content-wrapper")
-        if posts:
-            logger.info(f"Account: {item[0]} has {len(posts)} posts found.")
+        load_posts(driver, 'truth_social', item, url_link)
+        count, posts = extract_posts(driver, 'truth_social')
+        if count:
+            logger.info(f"Account: {item[0]} has {count} posts found.")
         else:
             logger.warning(f"No posts found on the {item[0]} page!")
-        for index, post in enumerate(posts[:10]):
-            retry_attempts = 3
-            while retry_attempts > 0:
-                try:
-                    post = driver.find_elements(By.CSS_SELECTOR, "div.status__content-wrapper")[index]
-                    post_text_elements = post.find_elements(By.CSS_SELECTOR, "p")
-                    post_text_elements_clean = post_text_elements
-                    if not post_text_elements:
-                        logger.warning(f"No text found in post {index + 1}: {post.get_attribute('outerHTML')}")
-                        break
-                    if len(post_text_elements) > 3:
-                        post_text_elements_clean = post_text_elements[:-3]
-                    post_text = " ".join([p.text.strip() for p in post_text_elements_clean if p.text.strip()])
-                    post_text = normalize_text(post_text)
-                    found_keywords = check_for_keywords(post_text)
-                    if found_keywords:
-                        alert_event(item, found_keywords, post_text, url_link)
-                    elif DEBUG_ENABLED:
-                        logger.info(f"NO MATCH FOUND IN ---->  {post_text}")
-                    break
-                except (StaleElementReferenceException, NoSuchElementException):
-                    logger.warning(f"StaleElementReferenceException: Retrying post {index + 1}")
-                    retry_attempts -= 1
-                    time.sleep(1)
-                except Exception as e:
-                    logger.error(f"Error processing post {index + 1}: {e}")
-                    break
+        check_posts(item, posts, url_link)
     except Exception as e:
         logger.error(f"Error checking Truth Social account {item[0]}: {e}")
 
-def alert_event(item, found_keywords, post_text, url_link):
+def alert_event(item, found_keywords, post_text, url_link, post_id=None):
+    global LOADED_POSTS, logger
+    with ALERT_LOCK:
+        if LOADED_POSTS.seen(post_id, post_text):
+            logger.info(f"Post by {item[0]} already alerted by another worker")
+            return
+        send_alert(item, found_keywords, post_text, url_link)
+        LOADED_POSTS.add(post_id, post_text)
+
+def send_alert(item, found_keywords, post_text, url_link):
     global logger
     logger.info("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
     logger.info(f"Found crypto keywords in post by {item[0]}: {found_keywords}")
@@ -197,12 +191,25 @@ def alert_event(item, found_keywords, post_text, url_link):
     if SMS_ENABLED and item[1]:
         sms_message = subject + " - " + url_link
         send_sms(sms_message)
-    save_found_post(post_text)
 
-def scroll_down(driver, scrolls=5, scroll_height=500, wait_time=1):
+def load_posts(driver, site, item, url_link):
+    global DEBUG_ENABLED, PAGE_WAITER, logger
+    driver.get(url_link)
+    count, settled, elapsed = PAGE_WAITER.wait_for_count(driver, site, POST_SELECTORS[site])
+    if not settled:
+        logger.warning(f"Posts for {item[0]} did not settle within {elapsed:.1f}s")
+    elif DEBUG_ENABLED:
+        logger.info(f"Posts for {item[0]} settled at {count} in {elapsed:.2f}s")
+    if settled and count < POST_LIMIT:
+        scroll_down(driver, site, count)
+
+def scroll_down(driver, site, count, scrolls=1, scroll_height=500):
+    global PAGE_WAITER
     for _ in range(scrolls):
         driver.execute_script("window.scrollBy(0, arguments[0]);", scroll_height)
-        time.sleep(wait_time)
+        count, settled, _ = PAGE_WAITER.wait_for_count(driver, f"{site}_scroll", POST_SELECTORS[site], count + 1, SCROLL_TIMEOUT, False)
+        if not settled or count >= POST_LIMIT:
+            break
 
 def send_email(subject, body):
     global logger
@@ -263,26 +270,71 @@ def check_carrier():
                 time.sleep(1)
 
 def load_found_posts():
-    global FOUND_POSTS_FILE, LOADED_POSTS, logger
+    global FOUND_POSTS_FILE, FOUND_POSTS_LOG, logger
     logger.info("load_found_posts...")
-    LOADED_POSTS = set()
-    if os.path.exists(FOUND_POSTS_FILE):
-        with open(FOUND_POSTS_FILE, "r", encoding="utf-8") as f:
-            LOADED_POSTS = set(line.strip() for line in f)
-        f.close()
-    return LOADED_POSTS
-
-def save_found_post(post_text):
-    global FOUND_POSTS_FILE, logger
-    logger.info("save_found_post...")
-    with open(FOUND_POSTS_FILE, "a", encoding="utf-8") as f:
-        f.write(post_text + "\n")
-    f.close()
+    migrate = not os.path.exists(FOUND_POSTS_LOG)
+    store = PostStore(FOUND_POSTS_LOG).load(FOUND_POSTS_FILE)
+    if migrate and os.path.exists(FOUND_POSTS_FILE):
+        logger.info(f"Migrated {len(store)} posts from {FOUND_POSTS_FILE}")
+    logger.info(f"Loaded {len(store)} post fingerprints")
+    return store
 
 def normalize_text(text):
     text = text.replace('\n', ' ').strip()
     return text
 
+def get_worker_driver(drivers, drivers_lock):
+    driver = getattr(WORKER_STATE, 'driver', None)
+    if driver is None:
+        driver = setup_browser()
+        WORKER_STATE.driver = driver
+        if driver:
+            with drivers_lock:
+                drivers.append(driver)
+    return driver
+
+def scan_account(site, item, site_limits, drivers, drivers_lock):
+    global logger
+    with site_limits[site]:
+        reload_keywords()
+        driver = get_worker_driver(drivers, drivers_lock)
+        if not driver:
+            logger.error(f"No browser available to check {item[0]}")
+            return
+        if site == 'truth_social':
+            check_truth_social_account(driver, item)
+        else:
+            check_twitter_account(driver, item)
+
+def scan_accounts(drivers, workers=SCAN_WORKERS):
+    global TRUTH_SOCIAL_ACCOUNTS, TWITTER_ACCOUNTS, logger
+    site_limits = {site: threading.BoundedSemaphore(limit) for site, limit in SITE_LIMITS.items()}
+    drivers_lock = threading.Lock()
+    jobs = [job for pair in zip_longest([('truth_social', item) for item in TRUTH_SOCIAL_ACCOUNTS], [('twitter', item) for item in TWITTER_ACCOUNTS]) for job in pair if job]
+    logger.info(f"Scanning {len(jobs)} accounts with {workers} workers")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(scan_account, site, item, site_limits, drivers, drivers_lock) for site, item in jobs]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error scanning account: {e}")
+
+def close_driver(driver):
+    global logger
+    service = driver.service
+    try:
+        driver.quit()
+        logger.info("Browser session closed successfully.")
+    except Exception as e:
+        logger.error(f"Error while quitting driver: {e}")
+    if service:
+        try:
+            service.stop()
+            logger.info("Selenium service stopped successfully.")
+        except Exception as e:
+            logger.error(f"Error while stopping Selenium service: {e}")
+
 def run_monitor(mode="MAIN", log=None):
     global LOADED_POSTS, TRUTH_SOCIAL_ACCOUNTS, TWITTER_ACCOUNTS, logger
     logger = log
@@ -292,37 +344,20 @@ def run_monitor(mode="MAIN", log=None):
         logger.info("Sent text messages to all carriers please confirm cell carrier...")
         return
     LOADED_POSTS = load_found_posts()
-    driver = None
-    service = None
+    drivers = []
     try:
-        driver = setup_browser()
-        service = driver.service
-        for item in TRUTH_SOCIAL_ACCOUNTS:
-            check_truth_social_account(driver, item)
-            time.sleep(2)
-        for item in TWITTER_ACCOUNTS:
-            check_twitter_account(driver, item)
-            time.sleep(2)
+        scan_accounts(drivers)
     except KeyboardInterrupt:
         logger.info("Monitoring stopped by user")
-        if driver:
-            driver.quit()
-            logger.info("Browser session closed on user interrupt.")
     except Exception as e:
         logger.error(f"Error in main monitoring loop: {e}")
     finally:
-        if driver:
-            try:
-                driver.quit()
-                logger.info("Browser session closed successfully.")
-            except Exception as e:
-                logger.error(f"Error while quitting driver: {e}")
-        if service:
-            try:
-                service.stop()
-                logger.info("Selenium service stopped successfully.")
-            except Exception as e:
-                logger.error(f"Error while stopping Selenium service: {e}")
+        for driver in drivers:
+            close_driver(driver)
+        try:
+            PAGE_WAITER.save()
+        except Exception as e:
+            logger.error(f"Failed to save learned wait times: {e}")
     log_path = os.path.join(os.getcwd(), "geckodriver.log")
     if os.path.exists(log_path):
         try:
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+LOG_MAGIC = b'FPS1'
+RECORD = struct.Struct('<QI')
+MAX_ENTRIES = 50000
+TTL_SECONDS = 30 * 86400
+COMPACT_RATIO = 2
+
+
+def normalize_post_text(text):
+    return ' '.join(text.split())
+
+def post_fingerprint(post_id, text):
+    key = f"{post_id or ''}\x1f{normalize_post_text(text)}".encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+class PostStore:
+    def __init__(self, log_file, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS):
+        self.log_file = log_file
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.log_records = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self, legacy_file=None):
+        entries = OrderedDict()
+        records = 0
+        rewrite = True
+        if os.path.exists(self.log_file):
+            with open(self.log_file, 'rb') as file:
+                data = file.read()
+            if data[:len(LOG_MAGIC)] == LOG_MAGIC:
+                rewrite = False
+                end = len(LOG_MAGIC) + (len(data) - len(LOG_MAGIC)) // RECORD.size * RECORD.size
+                for fingerprint, seen in RECORD.iter_unpack(data[len(LOG_MAGIC):end]):
+                    entries.pop(fingerprint, None)
+                    entries[fingerprint] = seen
+                    records += 1
+                if end != len(data):
+                    with open(self.log_file, 'r+b') as file:
+                        file.truncate(end)
+        elif legacy_file and os.path.exists(legacy_file):
+            now = int(time.time())
+            with open(legacy_file, 'r', encoding='utf-8') as file:
+                for line in file:
+                    if line.strip():
+                        entries[post_fingerprint(None, line)] = now
+        with self.lock:
+            self.entries = entries
+            self.log_records = records
+            self.evict(int(time.time()))
+        if rewrite or self.needs_compaction():
+            self.compact()
+        return self
+
+    def evict(self, now):
+        entries = self.entries
+        while entries:
+            fingerprint, seen = next(iter(entries.items()))
+            if len(entries) <= self.max_entries and now - seen < self.ttl:
+                break
+            del entries[fingerprint]
+
+    def write_record(self, fingerprint, seen):
+        with open(self.log_file, 'ab') as file:
+            file.write(RECORD.pack(fingerprint, seen))
+            file.flush()
+            os.fsync(file.fileno())
+        self.log_records += 1
+
+    def seen(self, post_id, text):
+        now = int(time.time())
+        keys = [post_fingerprint(post_id, text)]
+        if post_id:
+            keys.append(post_fingerprint(None, text))
+        with self.lock:
+            for fingerprint in keys:
+                seen = self.entries.get(fingerprint)
+                if seen is None or now - seen >= self.ttl:
+                    continue
+                if now - seen >= self.ttl // 2:
+                    self.entries.move_to_end(fingerprint)
+                    self.entries[fingerprint] = now
+                    self.write_record(fingerprint, now)
+                return True
+        return False
+
+    def add(self, post_id, text):
+        now = int(time.time())
+        fingerprint = post_fingerprint(post_id, text)
+        with self.lock:
+            self.entries.pop(fingerprint, None)
+            self.entries[fingerprint] = now
+            self.evict(now)
+            self.write_record(fingerprint, now)
+        if self.needs_compaction():
+            self.compact()
+        return fingerprint
+
+    def needs_compaction(self):
+        with self.lock:
+            return self.log_records > COMPACT_RATIO * max(len(self.entries), 1024)
+
+    def compact(self):
+        with self.lock:
+            payload = LOG_MAGIC + b''.join(RECORD.pack(fingerprint, seen) for fingerprint, seen in self.entries.items())
+            with open(self.log_file + '.tmp', 'wb') as file:
+                file.write(payload)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(self.log_file + '.tmp', self.log_file)
+            self.log_records = len(self.entries)
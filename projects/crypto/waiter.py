@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+
+INITIAL_TIMEOUT = 8.0
+SCROLL_TIMEOUT = 1.0
+MIN_TIMEOUT = 1.0
+MAX_TIMEOUT = 20.0
+SCRIPT_MARGIN = 2.0
+QUIET_SECONDS = 0.3
+EWMA_ALPHA = 0.25
+EWMA_BETA = 0.25
+DEVIATION_FACTOR = 4
+
+SETTLE_SCRIPT = """
+const selector = arguments[0], minCount = arguments[1], quietMs = arguments[2], timeoutMs = arguments[3];
+const done = arguments[arguments.length - 1];
+const started = performance.now();
+const count = () => document.querySelectorAll(selector).length;
+let lastCount = count();
+let quietTimer = null;
+let finished = false;
+const finish = (settled) => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(deadline);
+    done(JSON.stringify({count: count(), settled: settled, elapsed: (performance.now() - started) / 1000}));
+};
+const update = () => {
+    const current = count();
+    if (current === lastCount && quietTimer !== null) return;
+    lastCount = current;
+    clearTimeout(quietTimer);
+    quietTimer = current >= minCount ? setTimeout(() => finish(true), quietMs) : null;
+};
+const observer = new MutationObserver(update);
+observer.observe(document.body || document.documentElement, {childList: true, subtree: true});
+const deadline = setTimeout(() => finish(false), timeoutMs);
+update();
+"""
+
+
+class AdaptiveWaiter:
+    def __init__(self, state_file=None):
+        self.state_file = state_file
+        self.lock = threading.Lock()
+        self.estimates = {}
+        self.load()
+
+    def load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r') as file:
+                self.estimates = {key: list(value) for key, value in json.load(file).items()}
+        except ValueError:
+            self.estimates = {}
+
+    def save(self):
+        if not self.state_file:
+            return
+        with self.lock:
+            estimates = dict(self.estimates)
+        with open(self.state_file + '.tmp', 'w') as file:
+            json.dump(estimates, file)
+        os.replace(self.state_file + '.tmp', self.state_file)
+
+    def timeout(self, key, initial=INITIAL_TIMEOUT):
+        with self.lock:
+            estimate = self.estimates.get(key)
+        if estimate is None:
+            return initial
+        mean, deviation = estimate
+        return min(max(mean + DEVIATION_FACTOR * deviation, MIN_TIMEOUT), MAX_TIMEOUT)
+
+    def observe(self, key, seconds):
+        with self.lock:
+            estimate = self.estimates.get(key)
+            if estimate is None:
+                self.estimates[key] = [seconds, seconds / 2]
+                return
+            mean, deviation = estimate
+            deviation = (1 - EWMA_BETA) * deviation + EWMA_BETA * abs(seconds - mean)
+            mean = (1 - EWMA_ALPHA) * mean + EWMA_ALPHA * seconds
+            self.estimates[key] = [mean, deviation]
+
+    def wait_for_count(self, driver, key, selector, min_count=1, initial=INITIAL_TIMEOUT, learn_timeouts=True):
+        timeout = self.timeout(key, initial)
+        driver.set_script_timeout(timeout + SCRIPT_MARGIN)
+        result = json.loads(driver.execute_async_script(SETTLE_SCRIPT, selector, min_count, int(QUIET_SECONDS * 1000), int(timeout * 1000)))
+        if result['settled']:
+            self.observe(key, result['elapsed'])
+        elif learn_timeouts:
+            self.observe(key, timeout)
+        return result['count'], result['settled'], result['elapsed']
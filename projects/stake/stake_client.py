@@ -0,0 +1,220 @@
+import asyncio
+import gzip
+import http.client
+import json
+import os
+import time
+import zlib
+from urllib.parse import urlsplit
+
+STAKE_API_URL = os.getenv('STAKE_API_URL', 'https://stake.us/_api/graphql')
+REQUEST_TIMEOUT = 30
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+
+class StakeClientError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+def cookie_header(cookies):
+    return '; '.join([f"{cookie['name']}={cookie['value']}" for cookie in cookies])
+
+SINK_FIELDS = {
+    'store': ('id', 'startTime', '{point}'),
+    'csv': ('startTime', '{point}'),
+    'mysql': ('id', 'startTime', '{point}'),
+    'hash': ('id', 'hash { hash }')
+}
+
+
+def history_fields(point_field, sinks):
+    fields = []
+    for sink in sinks:
+        for field in SINK_FIELDS[sink]:
+            field = field.replace('{point}', point_field)
+            if field not in fields:
+                fields.append(field)
+    return fields
+
+def history_alias(offset):
+    return f"offset{offset}"
+
+def build_history_query(query_outer_name, query_name, fields, offsets, limit):
+    selection = ' '.join(fields)
+    windows = '\n'.join(f"    {history_alias(offset)}: {query_name}(limit: {limit}, offset: {offset}) {{ {selection} }}" for offset in offsets)
+    return f"query {query_outer_name}History {{\n{windows}\n}}"
+
+def decode_body(payload, encoding):
+    encoding = (encoding or '').lower()
+    if encoding == 'gzip':
+        return gzip.decompress(payload)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(payload)
+        except zlib.error:
+            return zlib.decompress(payload, -zlib.MAX_WBITS)
+    return payload
+
+
+class StakeGraphQLClient:
+    def __init__(self, cookies, url=STAKE_API_URL, user_agent=None, timeout=REQUEST_TIMEOUT):
+        parts = urlsplit(url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path or '/'
+        self.timeout = timeout
+        self.connection = None
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/graphql+json, application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+            "Origin": f"{parts.scheme}://{parts.netloc}",
+            "User-Agent": user_agent or DEFAULT_USER_AGENT,
+            "Cookie": cookie_header(cookies)
+        }
+
+    def connect(self):
+        if self.scheme == 'https':
+            self.connection = http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        else:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self.connection
+
+    def set_cookies(self, cookies):
+        self.headers["Cookie"] = cookie_header(cookies)
+
+    def post(self, query, variables=None):
+        body = json.dumps({"query": query, "variables": variables or {}}).encode('utf-8')
+        for attempt in range(2):
+            try:
+                connection = self.connection or self.connect()
+                connection.request("POST", self.path, body=body, headers=self.headers)
+                response = connection.getresponse()
+                payload = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                self.close()
+                if attempt:
+                    raise
+        payload = decode_body(payload, response.getheader('Content-Encoding'))
+        if (response.getheader('Connection') or '').lower() == 'close':
+            self.close()
+        if response.status != 200:
+            raise StakeClientError(response.status, payload[:200].decode('utf-8', 'replace'))
+        return json.loads(payload)
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BrowserGraphQLClient:
+    def __init__(self, driver, cookies, url=STAKE_API_URL):
+        self.driver = driver
+        self.url = url
+        self.escaped_cookie_str = cookie_header(cookies).replace('"', '\\"')
+
+    def set_cookies(self, cookies):
+        self.escaped_cookie_str = cookie_header(cookies).replace('"', '\\"')
+
+    def post(self, query, variables=None):
+        script = f"""
+            return fetch("{self.url}", {{
+                method: "POST",
+                headers: {{
+                    "Content-Type": "application/json",
+                    "Accept": "application/graphql+json, application/json",
+                    "Cookie": "{self.escaped_cookie_str}"
+                }},
+                body: JSON.stringify({{
+                    query: arguments[0],
+                    variables: arguments[1]
+                }})
+            }}).then(response => response.json());
+        """
+        return self.driver.execute_script(script, query, variables or {})
+
+    def close(self):
+        pass
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def fetch_pages_async(clients, build_query, limit, max_offset, bucket, is_last_page, pages_per_request, start_offset=0):
+    pages = {}
+    errors = []
+    state = {'next_offset': start_offset, 'stop_offset': max_offset}
+
+    async def fetch_batch(client):
+        offsets = []
+        while len(offsets) < pages_per_request and state['next_offset'] < state['stop_offset']:
+            offsets.append(state['next_offset'])
+            state['next_offset'] += limit
+        if not offsets:
+            return False
+        await bucket.acquire()
+        offsets = [offset for offset in offsets if offset < state['stop_offset']]
+        if not offsets:
+            return False
+        try:
+            response_data = await asyncio.to_thread(client.post, build_query(tuple(offsets)))
+            windows = [(offset, response_data['data'][history_alias(offset)]) for offset in offsets]
+        except Exception as e:
+            errors.append((offsets[0], e))
+            state['stop_offset'] = min(state['stop_offset'], offsets[0])
+            return False
+        for offset, game_list in windows:
+            pages[offset] = game_list
+            if not game_list or is_last_page(game_list):
+                state['stop_offset'] = min(state['stop_offset'], offset + limit)
+                return False
+        return True
+
+    async def worker(client):
+        while await fetch_batch(client):
+            pass
+
+    if await fetch_batch(clients[0]):
+        await asyncio.gather(*(worker(client) for client in clients))
+    ordered_pages = []
+    for offset in range(start_offset, state['stop_offset'], limit):
+        if offset not in pages:
+            break
+        ordered_pages.append(pages[offset])
+    return ordered_pages, errors
+
+def fetch_history_pages(clients, build_query, limit=50, max_offset=900, rate=4.0, burst=4, is_last_page=None, pages_per_request=1, start_offset=0):
+    async def run():
+        bucket = TokenBucket(rate, burst)
+        return await fetch_pages_async(clients, build_query, limit, max_offset, bucket, is_last_page or (lambda game_list: False), pages_per_request, start_offset)
+
+    return asyncio.run(run())
@@ -0,0 +1,95 @@
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+import mysql.connector
+from mysql.connector import pooling
+
+db_config = {
+    'host': os.getenv('MYSQL_HOST', ''),
+    'user': os.getenv('MYSQL_USER', ''),
+    'password': os.getenv('MYSQL_PASS', ''),
+    'database': os.getenv('MYSQL_DB', '')
+}
+
+POOL_NAME = 'stake_pool'
+POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', '4'))
+PING_ATTEMPTS = 3
+PING_DELAY = 1
+
+pool = None
+pool_lock = threading.Lock()
+prepared_cursors = weakref.WeakKeyDictionary()
+inherited_pools = []
+
+
+def get_pool():
+    global pool
+    with pool_lock:
+        if pool is None:
+            pool = pooling.MySQLConnectionPool(pool_name=POOL_NAME, pool_size=POOL_SIZE, pool_reset_session=False, **db_config)
+    return pool
+
+def reset_pool():
+    global pool
+    with pool_lock:
+        pool = None
+
+def detach_pool():
+    global pool, pool_lock
+    pool_lock = threading.Lock()
+    if pool is not None:
+        inherited_pools.append(pool)
+    pool = None
+
+def get_raw_connection(connection):
+    return getattr(connection, '_cnx', connection)
+
+def check_connection(connection):
+    if connection.is_connected():
+        return connection
+    prepared_cursors.pop(get_raw_connection(connection), None)
+    connection.ping(reconnect=True, attempts=PING_ATTEMPTS, delay=PING_DELAY)
+    return connection
+
+def get_connection():
+    try:
+        connection = get_pool().get_connection()
+    except pooling.PoolError:
+        return mysql.connector.connect(**db_config)
+    try:
+        return check_connection(connection)
+    except mysql.connector.Error:
+        connection.close()
+        reset_pool()
+        return get_pool().get_connection()
+
+@contextmanager
+def db_connection():
+    connection = get_connection()
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+def get_prepared_cursor(connection, query):
+    raw_connection = get_raw_connection(connection)
+    try:
+        cursors = prepared_cursors.setdefault(raw_connection, {})
+    except TypeError:
+        return connection.cursor(prepared=True)
+    cursor = cursors.get(query)
+    if cursor is None:
+        try:
+            cursor = connection.cursor(prepared=True)
+        except (mysql.connector.NotSupportedError, TypeError):
+            return connection.cursor()
+        cursors[query] = cursor
+    return cursor
+
+def fetch_one_prepared(connection, query, params=()):
+    cursor = get_prepared_cursor(connection, query)
+    cursor.execute(query, params)
+    result = cursor.fetchone()
+    cursor.fetchall()
+    return result
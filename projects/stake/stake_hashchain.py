@@ -0,0 +1,59 @@
+import hashlib
+import hmac
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+CHAIN_SALT = os.getenv('STAKE_CHAIN_SALT', '0000000000000000001b34dc6a1e86083f95500b096231436e9b25cbdd0075c4')
+HOUSE_EDGE = 0.01
+CHUNK_SIZE = 100000
+
+
+def previous_hash(game_hash):
+    return hashlib.sha256(game_hash.encode('ascii')).hexdigest()
+
+def walk_chain(game_hash, count):
+    hashes = [game_hash]
+    sha256 = hashlib.sha256
+    current = game_hash
+    for _ in range(count - 1):
+        current = sha256(current.encode('ascii')).hexdigest()
+        hashes.append(current)
+    return hashes
+
+def crashpoint_from_hash(game_hash, salt=CHAIN_SALT, house_edge=HOUSE_EDGE):
+    digest = hmac.new(game_hash.encode('ascii'), salt.encode('ascii'), hashlib.sha256).digest()
+    value = int.from_bytes(digest[:4], 'big')
+    return max(1.0, int((2 ** 32 / (value + 1)) * (1 - house_edge) * 100) / 100)
+
+def crashpoints_from_hashes(hashes, salt=CHAIN_SALT, house_edge=HOUSE_EDGE):
+    salt_bytes = salt.encode('ascii')
+    digest = hmac.digest
+    values = [int.from_bytes(digest(game_hash.encode('ascii'), salt_bytes, 'sha256')[:4], 'big') for game_hash in hashes]
+    scale = 2 ** 32 * (1 - house_edge) * 100
+    return array('d', [max(1.0, int(scale / (value + 1)) / 100) for value in values])
+
+def compute_crashpoints(hashes, processes=1, salt=CHAIN_SALT, house_edge=HOUSE_EDGE, chunk_size=CHUNK_SIZE):
+    if processes <= 1 or len(hashes) <= chunk_size:
+        return crashpoints_from_hashes(hashes, salt, house_edge)
+    chunks = [hashes[start:start + chunk_size] for start in range(0, len(hashes), chunk_size)]
+    points = array('d')
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for chunk_points in executor.map(crashpoints_from_hashes, chunks, [salt] * len(chunks), [house_edge] * len(chunks)):
+            points.extend(chunk_points)
+    return points
+
+def derive_crashpoints(game_hash, count, processes=1, salt=CHAIN_SALT, house_edge=HOUSE_EDGE):
+    hashes = walk_chain(game_hash, count)
+    return hashes, compute_crashpoints(hashes, processes, salt, house_edge)
+
+def verify_chain_links(hashes):
+    broken = []
+    for index in range(len(hashes) - 1):
+        if previous_hash(hashes[index]) != hashes[index + 1]:
+            broken.append(index)
+    return broken
+
+def verify_crashpoints(hashes, points, processes=1, salt=CHAIN_SALT, house_edge=HOUSE_EDGE, tolerance=0.005):
+    expected = compute_crashpoints(hashes, processes, salt, house_edge)
+    return [index for index, (point, derived) in enumerate(zip(points, expected)) if abs(float(point) - derived) > tolerance]
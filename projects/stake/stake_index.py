@@ -0,0 +1,168 @@
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+from projects.stake.stake_rounds import format_epoch, parse_iso_epoch
+from projects.stake.stake_store import load_store
+
+logger = logging.getLogger("null")
+logger.addHandler(logging.NullHandler())
+
+QUERY_TYPES = ('last', 'hits', 'gaps')
+NO_POINT = float('-inf')
+
+
+class ThresholdIndex:
+    __slots__ = ('history', 'size', 'tree')
+
+    def __init__(self, history):
+        self.history = history.sorted()
+        points = self.history.points
+        size = 1
+        while size < len(points):
+            size *= 2
+        tree = array('d', [NO_POINT]) * (2 * size)
+        tree[size:size + len(points)] = points
+        level = tree[size:]
+        start = size
+        while start > 1:
+            level = array('d', map(max, level[0::2], level[1::2]))
+            start //= 2
+            tree[start:start * 2] = level
+        self.size = size
+        self.tree = tree
+
+    def __len__(self):
+        return len(self.history)
+
+    def index_range(self, start_time=None, end_time=None):
+        times = self.history.times
+        first = 0 if start_time is None else bisect_left(times, start_time)
+        last = len(times) - 1 if end_time is None else bisect_right(times, end_time) - 1
+        return first, last
+
+    def next_above(self, threshold, start):
+        tree = self.tree
+        if start >= len(self.history):
+            return None
+        node = start + self.size
+        while tree[node] <= threshold:
+            while node & 1:
+                node >>= 1
+            if not node:
+                return None
+            node += 1
+        while node < self.size:
+            node = 2 * node if tree[2 * node] > threshold else 2 * node + 1
+        return node - self.size
+
+    def previous_above(self, threshold, end):
+        tree = self.tree
+        if end < 0:
+            return None
+        node = min(end, len(self.history) - 1) + self.size
+        while tree[node] <= threshold:
+            while not node & 1:
+                node >>= 1
+            if node == 1:
+                return None
+            node -= 1
+        while node < self.size:
+            node = 2 * node + 1 if tree[2 * node + 1] > threshold else 2 * node
+        return node - self.size
+
+    def range_max(self, first, last):
+        tree = self.tree
+        best = NO_POINT
+        low = first + self.size
+        high = last + self.size + 1
+        while low < high:
+            if low & 1:
+                best = max(best, tree[low])
+                low += 1
+            if high & 1:
+                high -= 1
+                best = max(best, tree[high])
+            low >>= 1
+            high >>= 1
+        return best
+
+    def last_above(self, threshold, end_time=None):
+        _, last = self.index_range(None, end_time)
+        index = self.previous_above(threshold, last)
+        return None if index is None else self.history[index]
+
+    def hit_indexes(self, threshold, start_time=None, end_time=None):
+        first, last = self.index_range(start_time, end_time)
+        index = self.next_above(threshold, first)
+        while index is not None and index <= last:
+            yield index
+            index = self.next_above(threshold, index + 1)
+
+    def rounds_above(self, threshold, start_time=None, end_time=None):
+        return [self.history[index] for index in self.hit_indexes(threshold, start_time, end_time)]
+
+    def count_above(self, threshold, start_time=None, end_time=None):
+        return sum(1 for _ in self.hit_indexes(threshold, start_time, end_time))
+
+    def gaps_above(self, threshold, start_time=None, end_time=None):
+        times = self.history.times
+        gaps = []
+        previous = None
+        for index in self.hit_indexes(threshold, start_time, end_time):
+            if previous is not None:
+                gaps.append((self.history[index], index - previous, times[index] - times[previous]))
+            previous = index
+        return gaps
+
+
+def parse_query_time(value):
+    if value is None:
+        return None
+    return parse_iso_epoch(value if 'T' in value or ' ' in value else f"{value}T00:00:00")
+
+def resolve_window(history, start=None, end=None, days=None):
+    start_time = parse_query_time(start)
+    end_time = parse_query_time(end)
+    if days is not None:
+        start_time = (end_time if end_time is not None else history.times[-1]) - int(days * 86400)
+    return start_time, end_time
+
+def run_query(game_type="crash", query="last", threshold=2.0, start=None, end=None, days=None, log=None):
+    global logger
+    logger = log or logger
+    game_type = game_type.lower()
+    point_label = "Crashpoint" if game_type == "crash" else "Slidepoint"
+    history = load_store(game_type)
+    if not len(history):
+        logger.warning(f"No stored {game_type} history to query")
+        return None
+    index = ThresholdIndex(history)
+    start_time, end_time = resolve_window(history, start, end, days)
+    window = f"{format_epoch(start_time) if start_time is not None else 'start'} to {format_epoch(end_time) if end_time is not None else 'latest'}"
+    if query == "last":
+        found = index.last_above(threshold, end_time)
+        if found is None:
+            logger.info(f"No {game_type} rounds above {threshold}")
+        else:
+            since = len(index) - 1 - found.index
+            logger.info(f"Last {point_label} above {threshold}: {found.point} At Time: {format_epoch(found.start_time)} | RecordsSince: {since}")
+        return found
+    if query == "hits":
+        found = index.rounds_above(threshold, start_time, end_time)
+        for hit in found:
+            logger.info(f"{point_label}: {hit.point} At Time: {format_epoch(hit.start_time)}")
+        logger.info(f"{len(found)} {game_type} rounds above {threshold} from {window}")
+        return found
+    if query == "gaps":
+        found = index.gaps_above(threshold, start_time, end_time)
+        for hit, records, seconds in found:
+            logger.info(f"{point_label}: {hit.point} At Time: {format_epoch(hit.start_time)} | RecordsSincePrevious: {records} | TimeSincePrevious: {timedelta(seconds=seconds)}")
+        if found:
+            records = [gap[1] for gap in found]
+            logger.info(f"{len(found)} gaps above {threshold} from {window} | Mean: {sum(records) / len(records):.1f} rounds | Longest: {max(records)} rounds")
+        else:
+            logger.info(f"Fewer than two {game_type} rounds above {threshold} from {window}")
+        return found
+    logger.error(f"Unknown query type: {query}")
+    return None
@@ -0,0 +1,118 @@
+import json
+import os
+import zlib
+from projects.stake.stake_rounds import parse_iso_epoch
+from projects.stake.stake_store import DATA_DIR
+
+TAIL_BLOCK_SIZE = 4096
+SCAN_BLOCK_SIZE = 1 << 20
+
+
+def get_manifest_path(game_type):
+    return os.path.join(DATA_DIR, f'{game_type}_manifest.json')
+
+def new_manifest():
+    return {'csv': None, 'db_watermark': None, 'db_pending': None}
+
+def load_manifest(game_type):
+    manifest_path = get_manifest_path(game_type)
+    if not os.path.exists(manifest_path):
+        return new_manifest()
+    try:
+        with open(manifest_path, 'r') as file:
+            manifest = json.load(file)
+    except ValueError:
+        return new_manifest()
+    for key, value in new_manifest().items():
+        manifest.setdefault(key, value)
+    return manifest
+
+def save_manifest(game_type, manifest):
+    manifest_path = get_manifest_path(game_type)
+    with open(manifest_path + '.tmp', 'w') as file:
+        json.dump(manifest, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+def read_last_line(path):
+    with open(path, 'rb') as file:
+        end = file.seek(0, os.SEEK_END)
+        tail = b''
+        position = end
+        while position > 0:
+            step = min(TAIL_BLOCK_SIZE, position)
+            position -= step
+            file.seek(position)
+            tail = file.read(step) + tail
+            lines = tail.rstrip(b'\r\n').rsplit(b'\n', 1)
+            if len(lines) == 2 or position == 0:
+                return lines[-1].strip().decode('utf-8') or None
+    return None
+
+def csv_line_time(line):
+    if not line:
+        return None
+    _, start_time = line.split(',')
+    try:
+        return parse_iso_epoch(start_time)
+    except ValueError:
+        return None
+
+def crc_range(path, start, end):
+    crc = 0
+    with open(path, 'rb') as file:
+        file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = file.read(min(SCAN_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            crc = zlib.crc32(block, crc)
+    return crc
+
+def scan_csv(path):
+    size = 0
+    newlines = 0
+    with open(path, 'rb') as file:
+        while True:
+            block = file.read(SCAN_BLOCK_SIZE)
+            if not block:
+                break
+            size += len(block)
+            newlines += block.count(b'\n')
+    tail_offset = max(size - TAIL_BLOCK_SIZE, 0)
+    return {'size': size, 'rows': max(newlines - 1, 0), 'tail_offset': tail_offset, 'tail_crc32': crc_range(path, tail_offset, size),
+            'watermark': csv_line_time(read_last_line(path)) if size else None}
+
+def csv_entry_valid(manifest, path):
+    entry = manifest['csv']
+    if entry is None or 'tail_crc32' not in entry or not os.path.exists(path) or os.path.getsize(path) != entry['size']:
+        return False
+    return crc_range(path, entry['tail_offset'], entry['size']) == entry['tail_crc32']
+
+def record_csv_append(manifest, payload, rows, watermark):
+    entry = manifest['csv'] or {'size': 0, 'rows': 0, 'watermark': None}
+    entry['tail_offset'] = entry['size']
+    entry['tail_crc32'] = zlib.crc32(payload)
+    entry.pop('crc32', None)
+    entry['size'] += len(payload)
+    entry['rows'] += rows
+    entry['watermark'] = watermark
+    manifest['csv'] = entry
+    return manifest
+
+def mark_db_pending(manifest, first_time, last_time, rows):
+    pending = manifest['db_pending']
+    if pending:
+        first_time = min(first_time, pending['from'])
+        last_time = max(last_time, pending['to'])
+        rows += pending['rows']
+    manifest['db_pending'] = {'from': first_time, 'to': last_time, 'rows': rows}
+    return manifest
+
+def clear_db_pending(manifest, watermark):
+    manifest['db_pending'] = None
+    manifest['db_watermark'] = max(manifest['db_watermark'] or 0, watermark or 0) or None
+    return manifest
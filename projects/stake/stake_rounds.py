@@ -0,0 +1,135 @@
+import calendar
+import uuid
+from array import array
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+EPOCH = datetime(1970, 1, 1)
+ID_SIZE = 16
+EMPTY_ID = bytes(ID_SIZE)
+MONTHS = {name: index for index, name in enumerate(calendar.month_abbr) if name}
+EASTERN_DST_OFFSET = 4 * 3600
+EASTERN_STD_OFFSET = 5 * 3600
+
+
+def to_epoch(dt):
+    return calendar.timegm(dt.timetuple())
+
+def from_epoch(seconds):
+    return EPOCH + timedelta(seconds=seconds)
+
+@lru_cache(maxsize=4096)
+def format_day(days):
+    return (EPOCH + timedelta(days=days)).strftime('%Y-%m-%d')
+
+def format_epoch(seconds):
+    days, seconds = divmod(seconds, 86400)
+    return f"{format_day(days)}T{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+@lru_cache(maxsize=None)
+def month_start(year, month):
+    return calendar.timegm((year, month, 1, 0, 0, 0))
+
+def parse_iso_epoch(value):
+    return month_start(int(value[0:4]), int(value[5:7])) + (int(value[8:10]) - 1) * 86400 + int(value[11:13]) * 3600 + int(value[14:16]) * 60 + int(value[17:19])
+
+@lru_cache(maxsize=None)
+def eastern_transitions(year):
+    march = datetime(year, 3, 8)
+    november = datetime(year, 11, 1)
+    return to_epoch(march + timedelta(days=6 - march.weekday(), hours=2)), to_epoch(november + timedelta(days=6 - november.weekday(), hours=2))
+
+def parse_stake_time(value):
+    _, day, month, year, clock = value.split()[:5]
+    year = int(year)
+    seconds = month_start(year, MONTHS[month]) + (int(day) - 1) * 86400 + int(clock[0:2]) * 3600 + int(clock[3:5]) * 60 + int(clock[6:8])
+    dst_start, dst_end = eastern_transitions(year)
+    return seconds - (EASTERN_DST_OFFSET if dst_start <= seconds < dst_end else EASTERN_STD_OFFSET)
+
+def encode_round_id(round_id):
+    if not round_id:
+        return EMPTY_ID
+    return uuid.UUID(round_id).bytes
+
+def decode_round_id(raw):
+    if raw == EMPTY_ID:
+        return None
+    return str(uuid.UUID(bytes=bytes(raw)))
+
+
+class Round:
+    __slots__ = ('history', 'index')
+
+    def __init__(self, history, index):
+        self.history = history
+        self.index = index
+
+    @property
+    def point(self):
+        return self.history.points[self.index]
+
+    @property
+    def start_time(self):
+        return self.history.times[self.index]
+
+    @property
+    def round_id(self):
+        return decode_round_id(self.history.ids[self.index * ID_SIZE:(self.index + 1) * ID_SIZE])
+
+    def __repr__(self):
+        return f"Round(point={self.point}, start_time={format_epoch(self.start_time)}, round_id={self.round_id})"
+
+
+class RoundHistory:
+    __slots__ = ('points', 'times', 'ids')
+
+    def __init__(self, points=None, times=None, ids=None):
+        self.points = points if points is not None else array('d')
+        self.times = times if times is not None else array('q')
+        self.ids = ids if ids is not None else bytearray(ID_SIZE * len(self.points))
+
+    def __len__(self):
+        return len(self.points)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.points)
+        if not 0 <= index < len(self.points):
+            raise IndexError("round index out of range")
+        return Round(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.points)):
+            yield Round(self, index)
+
+    def append(self, point, seconds, round_id=None):
+        self.points.append(point)
+        self.times.append(seconds)
+        self.ids += encode_round_id(round_id)
+
+    def extend(self, other):
+        self.points.extend(other.points)
+        self.times.extend(other.times)
+        self.ids += other.ids
+
+    def is_sorted(self):
+        times = self.times
+        return all(times[i] <= times[i + 1] for i in range(len(times) - 1))
+
+    def sorted(self):
+        if self.is_sorted():
+            return self
+        order = sorted(range(len(self.times)), key=self.times.__getitem__)
+        return self.take(order)
+
+    def take(self, order):
+        ids = bytearray()
+        for index in order:
+            ids += self.ids[index * ID_SIZE:(index + 1) * ID_SIZE]
+        return RoundHistory(array('d', (self.points[i] for i in order)), array('q', (self.times[i] for i in order)), ids)
+
+    def round_ids(self):
+        return [decode_round_id(self.ids[i:i + ID_SIZE]) for i in range(0, len(self.ids), ID_SIZE)]
+
+    def latest(self):
+        return max(self.times) if self.times else None
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from projects.stake.stake_index import QUERY_TYPES, ThresholdIndex, resolve_window
+from projects.stake.stake_rounds import format_epoch
+from projects.stake.stake_shared import get_analysis_state_path, thresholds
+from projects.stake.stake_stats import QUANTILES, load_stats, sketch_quantile, window_rates
+from projects.stake.stake_store import get_store_latest, load_store
+
+logger = logging.getLogger("null")
+logger.addHandler(logging.NullHandler())
+
+SERVICE_HOST = os.getenv('STAKE_SERVICE_HOST', '127.0.0.1')
+SERVICE_PORT = int(os.getenv('STAKE_SERVICE_PORT', '8765'))
+GAMES = ('crash', 'slide')
+LATEST_LIMIT = 50
+MAX_LATEST_LIMIT = 1000
+RESPONSE_CACHE_SIZE = 256
+
+cache = {}
+cache_lock = threading.Lock()
+
+
+def get_point_label(game_type):
+    return "crashpoint" if game_type == "crash" else "slidepoint"
+
+def data_version(game_type):
+    state_path = get_analysis_state_path(game_type)
+    return get_store_latest(game_type), os.stat(state_path).st_mtime_ns if os.path.exists(state_path) else None
+
+def get_game_cache(game_type):
+    global logger
+    version = data_version(game_type)
+    with cache_lock:
+        entry = cache.get(game_type)
+        if entry is None or entry['version'] != version:
+            if entry is not None:
+                logger.info(f"New {game_type} data detected, dropping cached responses")
+            entry = {'version': version, 'lock': threading.Lock(), 'index': None, 'state': None, 'responses': {}}
+            cache[game_type] = entry
+        return entry
+
+def get_index(entry, game_type):
+    with entry['lock']:
+        if entry['index'] is None:
+            entry['index'] = ThresholdIndex(load_store(game_type))
+        return entry['index']
+
+def get_state(entry, game_type):
+    with entry['lock']:
+        if entry['state'] is None:
+            state_path = get_analysis_state_path(game_type)
+            entry['state'] = {}
+            if os.path.exists(state_path):
+                with open(state_path, 'r') as file:
+                    entry['state'] = json.load(file)
+        return entry['state']
+
+def round_payload(game_type, found):
+    return {get_point_label(game_type): found.point, 'startTime': format_epoch(found.start_time), 'id': found.round_id}
+
+def get_param(params, name, default=None, cast=str):
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        return cast(values[0])
+    except ValueError:
+        raise ValueError(f"invalid {name}: {values[0]}")
+
+def build_reports(game_type, entry):
+    state = get_state(entry, game_type)
+    rows = state.get('rows', 0)
+    reports = []
+    for threshold, threshold_state in sorted(state.get('thresholds', {}).items(), key=lambda item: float(item[0])):
+        results = threshold_state['results']
+        latest_index = threshold_state['latest_index']
+        reports.append({
+            'threshold': float(threshold),
+            'hits': threshold_state['hits'],
+            'latest': results[0] if results else None,
+            'records_since_latest': rows - latest_index if latest_index is not None else None
+        })
+    return {'game': game_type, 'rows': rows, 'watermark': format_epoch(state['watermark']) if state.get('watermark') else None, 'reports': reports}
+
+def build_report(game_type, entry, threshold):
+    threshold_state = get_state(entry, game_type).get('thresholds', {}).get(threshold)
+    if threshold_state is None:
+        raise LookupError(threshold)
+    return threshold_state['results'][:500]
+
+def build_latest(game_type, entry, params):
+    limit = min(get_param(params, 'limit', LATEST_LIMIT, int), MAX_LATEST_LIMIT)
+    history = get_index(entry, game_type).history
+    return [round_payload(game_type, history[index]) for index in range(len(history) - 1, max(len(history) - limit, 0) - 1, -1)]
+
+def build_query(game_type, entry, params):
+    query = get_param(params, 'type', 'last')
+    if query not in QUERY_TYPES:
+        raise ValueError(f"invalid type: {query}")
+    threshold = get_param(params, 'above', None, float)
+    if threshold is None:
+        raise ValueError("missing above")
+    index = get_index(entry, game_type)
+    if not len(index):
+        return None
+    start_time, end_time = resolve_window(index.history, get_param(params, 'start'), get_param(params, 'end'), get_param(params, 'days', None, float))
+    if query == 'last':
+        found = index.last_above(threshold, end_time)
+        if found is None:
+            return None
+        return dict(round_payload(game_type, found), records_since=len(index) - 1 - found.index)
+    if query == 'hits':
+        return [round_payload(game_type, found) for found in index.rounds_above(threshold, start_time, end_time)]
+    return [dict(round_payload(game_type, found), records_since_previous=records, seconds_since_previous=seconds) for found, records, seconds in index.gaps_above(threshold, start_time, end_time)]
+
+def build_stats(game_type):
+    stats = load_stats(game_type, get_point_label(game_type), thresholds)
+    if stats is None:
+        raise LookupError(game_type)
+    return {
+        'rows': stats['rows'],
+        'watermark': format_epoch(stats['watermark']) if stats['watermark'] else None,
+        'mean': stats['total'] / stats['rows'] if stats['rows'] else None,
+        'max': stats['max'],
+        'quantiles': {str(quantile): sketch_quantile(stats['sketch'], quantile) for quantile in QUANTILES},
+        'histogram': stats['histogram'],
+        'streaks': stats['streaks'],
+        'windows': window_rates(stats)
+    }
+
+def build_payload(game_type, entry, route, params):
+    if route == ['reports']:
+        return build_reports(game_type, entry)
+    if len(route) == 2 and route[0] == 'reports':
+        return build_report(game_type, entry, route[1])
+    if route == ['latest']:
+        return build_latest(game_type, entry, params)
+    if route == ['query']:
+        return build_query(game_type, entry, params)
+    if route == ['stats']:
+        return build_stats(game_type)
+    raise LookupError('/'.join(route))
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    return any(tag.strip() in ('*', etag, f"W/{etag}") for tag in header.split(','))
+
+
+class StakeRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        segments = [segment for segment in parts.path.split('/') if segment]
+        if len(segments) < 2 or segments[0] not in GAMES:
+            return self.send_json(404, {'error': 'not found'})
+        game_type = segments[0]
+        try:
+            entry = get_game_cache(game_type)
+            key = f"{parts.path}?{parts.query}"
+            cached = entry['responses'].get(key)
+            if cached is None:
+                body = json.dumps(build_payload(game_type, entry, segments[1:], parse_qs(parts.query))).encode('utf-8')
+                cached = (f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"', body)
+                with entry['lock']:
+                    if len(entry['responses']) >= RESPONSE_CACHE_SIZE:
+                        entry['responses'].pop(next(iter(entry['responses'])))
+                    entry['responses'][key] = cached
+        except LookupError:
+            return self.send_json(404, {'error': 'not found'})
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+        except Exception as e:
+            logger.error(f"Error serving {self.path}: {e}")
+            return self.send_json(500, {'error': 'internal error'})
+        etag, body = cached
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def run_service(host=SERVICE_HOST, port=SERVICE_PORT, log=None):
+    global logger
+    logger = log or logger
+    server = ThreadingHTTPServer((host, port), StakeRequestHandler)
+    server.daemon_threads = True
+    logger.info(f"Serving stake data on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stake service stopped by user")
+    finally:
+        server.server_close()
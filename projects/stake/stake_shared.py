@@ -1,14 +1,28 @@
 import csv
+import gzip
+import io
 import json
 import logging
 import os
-import random
+import shutil
+import sys
 import time
-from datetime import datetime, timedelta, timezone
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from logging.handlers import BufferingHandler
 import mysql.connector
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.firefox.service import Service as FirefoxService
+from projects.stake.stake_client import BrowserGraphQLClient, StakeClientError, StakeGraphQLClient, build_history_query, fetch_history_pages, history_fields
+from projects.stake.stake_db import db_config, db_connection, detach_pool, fetch_one_prepared
+from projects.stake.stake_hashchain import verify_chain_links, verify_crashpoints
+from projects.stake.stake_manifest import clear_db_pending, csv_entry_valid, csv_line_time, load_manifest, mark_db_pending, read_last_line, record_csv_append, save_manifest, scan_csv
+from projects.stake.stake_rounds import RoundHistory, format_epoch, from_epoch, parse_iso_epoch, parse_stake_time, to_epoch
+from projects.stake.stake_stats import QUANTILES, fold_stats, load_stats, rebuild_stats, save_stats, sketch_quantile, window_rates
+from projects.stake.stake_store import append_store, begin_store_build, count_store_rows, export_store_to_csv, finish_store_build, get_store_latest, import_csv_to_store, load_store, load_store_range, store_exists
 
 logger = logging.getLogger("null")
 logger.addHandler(logging.NullHandler())
@@ -24,15 +38,32 @@ BROWSER_EXE_LOC = os.getenv('BROWSER_EXE_LOC', '')
 GECKO_EXE_LOC = os.getenv('GECKO_EXE_LOC', '')
 BROWSER_TYPE = os.getenv('BROWSER_TYPE', '')
 
-db_config = {
-    'host': os.getenv('MYSQL_HOST', ''),
-    'user': os.getenv('MYSQL_USER', ''),
-    'password': os.getenv('MYSQL_PASS', ''),
-    'database': os.getenv('MYSQL_DB', '')
-}
-
 DEBUG_ENABLED = True
 USE_DATABASE = True
+SQL_ANALYSIS = False
+USE_HTTP_CLIENT = True
+MAX_IN_FLIGHT = 4
+PAGE_RATE = 4.0
+PAGE_BURST = 4
+PAGES_PER_REQUEST = 3
+BACKFILL_ENABLED = True
+BACKFILL_CHUNK_PAGES = 20
+BACKFILL_MAX_OFFSET = 100000
+USE_LOAD_DATA = False
+LOAD_DATA_MIN_ROWS = 50000
+MYSQL_CHUNK_SIZE = 1000
+MYSQL_INSERT_MODE = "IGNORE"
+EXPORT_BATCH_SIZE = 5000
+EXPORT_TO_STORE = True
+EXPORT_COMPRESSED = False
+VERIFY_HASH_CHAIN = False
+VERIFY_PROCESSES = 1
+DAEMON_INTERVAL = 30
+COOKIE_REFRESH_MARGIN = 60
+SESSION_COOKIES = ('session',)
+AUTH_STATUSES = (401, 403)
+ANALYSIS_PROCESSES = 2
+STATS_ENABLED = True
 
 
 def setup_browser():
@@ -77,21 +108,21 @@ def setup_browser():
 def load_existing_data(game_type, point_label):
     global logger
     logger.info("load_existing_data...")
-    data = {}
+    if store_exists(game_type):
+        return load_store(game_type)
+    data = RoundHistory()
     file_path = os.path.join(DATA_DIR, f'{game_type}_data.csv')
     attempts = 0
     while attempts < 3:
         attempts += 1
         try:
+            data = RoundHistory()
             with open(file_path, 'r') as file:
                 csv_reader = csv.reader(file)
                 next(csv_reader)
                 for row in csv_reader:
                     point, start_time = row
-                    data[start_time] = {
-                        point_label: float(point),
-                        'startTime': start_time
-                    }
+                    data.append(float(point), parse_iso_epoch(start_time))
             break
         except Exception as e:
             logger.error(f"Error loading CSV: {e}. Retrying ({attempts}) after sleep.")
@@ -102,11 +133,9 @@ def get_latest_from_mysql(game_type):
     global logger
     query = f"SELECT start_time FROM stake_{game_type} ORDER BY start_time DESC LIMIT 1"
     try:
-        with mysql.connector.connect(**db_config) as connection:
-            with connection.cursor() as cursor:
-                cursor.execute(query)
-                result = cursor.fetchone()
-                return result[0] if result else None
+        with db_connection() as connection:
+            result = fetch_one_prepared(connection, query)
+            return to_epoch(result[0]) if result and result[0] else None
     except mysql.connector.Error as err:
         logger.error(f"Error fetching most recent start_time from MySQL: {err}")
         return None
@@ -121,56 +150,138 @@ def ensure_table_exists(game_type, point_label):
             `start_time` datetime NOT NULL,
             `created_date` datetime DEFAULT CURRENT_TIMESTAMP,
             PRIMARY KEY (`identity_id`),
-            UNIQUE KEY `unique_hash_id` (`hash_id`)
+            UNIQUE KEY `unique_hash_id` (`hash_id`),
+            KEY `idx_start_time` (`start_time`)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8 COLLATE=utf8_unicode_ci;
     """
     try:
-        with mysql.connector.connect(**db_config) as connection:
+        with db_connection() as connection:
             with connection.cursor() as cursor:
                 cursor.execute(create_stmt)
+                ensure_start_time_index(cursor, table_name)
                 connection.commit()
     except mysql.connector.Error as err:
         logger.error(f"Error creating table {table_name}: {err}")
 
-def insert_latest_mysql(game_type, point_label, records):
+def ensure_start_time_index(cursor, table_name):
     global logger
-    insert_query = f"""
-        INSERT INTO stake_{game_type} (hash_id, {point_label}, start_time)
-        VALUES (%s, %s, %s)
+    index_query = """
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = 'idx_start_time'
     """
+    cursor.execute(index_query, (table_name,))
+    if not cursor.fetchone()[0]:
+        logger.info(f"Adding idx_start_time index to {table_name}...")
+        cursor.execute(f"ALTER TABLE `{table_name}` ADD INDEX `idx_start_time` (`start_time`)")
+
+def insert_latest_mysql(game_type, point_label, records, chunk_size=None):
+    global logger
+    rows = [(round_id, point, from_epoch(seconds)) for round_id, point, seconds in zip(records.round_ids(), records.points, records.times) if round_id]
+    if USE_LOAD_DATA and len(rows) >= LOAD_DATA_MIN_ROWS:
+        return load_data_mysql(game_type, point_label, rows, len(records))
+    chunk_size = chunk_size or MYSQL_CHUNK_SIZE
+    if MYSQL_INSERT_MODE == "ON_DUPLICATE":
+        insert_query = f"""
+            INSERT INTO stake_{game_type} (hash_id, {point_label}, start_time)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE hash_id = hash_id
+        """
+    else:
+        insert_query = f"""
+            INSERT IGNORE INTO stake_{game_type} (hash_id, {point_label}, start_time)
+            VALUES (%s, %s, %s)
+        """
+    inserted = 0
     try:
-        with mysql.connector.connect(**db_config) as connection:
+        with db_connection() as connection:
             with connection.cursor() as cursor:
-                for record_id, record in records.items():
-                    hash_id = record['id']
-                    point = record[point_label]
-                    start_time = datetime.strptime(record['startTime'], '%m/%d/%Y %H:%M:%S')
-                    cursor.execute(insert_query, (hash_id, point, start_time))
-                connection.commit()
-        logger.info(f"Inserted {len(records)} new records into the database")
+                for start in range(0, len(rows), chunk_size):
+                    cursor.executemany(insert_query, rows[start:start + chunk_size])
+                    inserted += max(cursor.rowcount, 0)
+                    connection.commit()
     except mysql.connector.Error as err:
-        logger.error(f"Error inserting data into MySQL: {err}")
+        logger.error(f"Error inserting data into MySQL after {inserted} records: {err}")
+        return None
+    skipped = len(records) - inserted
+    logger.info(f"Inserted {inserted} new records into the database | Skipped: {skipped}")
+    return inserted, skipped
+
+def load_data_mysql(game_type, point_label, rows, total_records=None):
+    global logger
+    total_records = len(rows) if total_records is None else total_records
+    load_file = os.path.join(DATA_DIR, f'{game_type}_load_{os.getpid()}.csv')
+    load_query = f"""
+        LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE stake_{game_type}
+        FIELDS TERMINATED BY ',' LINES TERMINATED BY '\\n'
+        (hash_id, {point_label}, start_time)
+    """
+    inserted = 0
+    try:
+        with open(load_file, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            for hash_id, point, start_time in rows:
+                writer.writerow([hash_id, point, start_time.strftime('%Y-%m-%d %H:%M:%S')])
+        with mysql.connector.connect(**db_config, allow_local_infile=True, allow_local_infile_in_path=DATA_DIR) as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(load_query, (load_file,))
+                inserted = max(cursor.rowcount, 0)
+                connection.commit()
+    except (mysql.connector.Error, OSError) as err:
+        logger.error(f"Error loading data into MySQL: {err}")
+        return None
+    finally:
+        if os.path.exists(load_file):
+            os.remove(load_file)
+    skipped = total_records - inserted
+    logger.info(f"Loaded {inserted} new records into the database | Skipped: {skipped}")
+    return inserted, skipped
 
-def export_mysql_to_csv(game_type, point_label):
+def export_mysql_to_csv(game_type, point_label, to_store=EXPORT_TO_STORE, compress=EXPORT_COMPRESSED, batch_size=EXPORT_BATCH_SIZE):
     global logger
     output_file = os.path.join(DATA_DIR, f'{game_type}_data.csv')
     logger.info(f'export_mysql_to_csv {output_file}')
+    outputs = [(output_file, open(output_file + '.tmp', 'w', newline=''))]
+    if compress:
+        outputs.append((output_file + '.gz', gzip.open(output_file + '.gz.tmp', 'wt', newline='')))
+    writers = [csv.writer(file) for _, file in outputs]
+    build_dir = begin_store_build(game_type) if to_store else None
+    exported = 0
     try:
-        with mysql.connector.connect(**db_config) as connection:
-            with connection.cursor() as cursor:
-                select_query = f"SELECT {point_label}, start_time FROM stake_{game_type} ORDER BY start_time ASC"
-                cursor.execute(select_query)
-                rows = cursor.fetchall()
-        with open(output_file, 'w', newline='') as csvfile:
-            csv_writer = csv.writer(csvfile)
+        for csv_writer in writers:
             csv_writer.writerow([point_label, 'startTime'])
-            for row in rows:
-                point, start_time = row
-                formatted_time = start_time.strftime('%Y-%m-%dT%H:%M:%S')
-                csv_writer.writerow([point, formatted_time])
-        logger.info(f"Data exported successfully to {output_file}")
-    except mysql.connector.Error as err:
-        logger.error(f"MySQL export error: {err}")
+        with db_connection() as connection:
+            with connection.cursor(buffered=False) as cursor:
+                select_query = f"SELECT hash_id, {point_label}, start_time FROM stake_{game_type} ORDER BY start_time ASC"
+                cursor.execute(select_query)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    batch = RoundHistory()
+                    csv_rows = []
+                    for hash_id, point, start_time in rows:
+                        csv_rows.append((point, start_time.strftime('%Y-%m-%dT%H:%M:%S')))
+                        if build_dir:
+                            batch.append(float(point), to_epoch(start_time), hash_id)
+                    for csv_writer in writers:
+                        csv_writer.writerows(csv_rows)
+                    if build_dir:
+                        append_store(game_type, batch, build_dir)
+                    exported += len(rows)
+        for path, file in outputs:
+            file.close()
+            os.replace(path + '.tmp', path)
+        if build_dir:
+            finish_store_build(game_type, build_dir)
+        logger.info(f"Data exported successfully to {output_file} ({exported} records)")
+    except (mysql.connector.Error, OSError, ValueError) as err:
+        logger.error(f"MySQL export error after {exported} records: {err}")
+        for path, file in outputs:
+            file.close()
+            if os.path.exists(path + '.tmp'):
+                os.remove(path + '.tmp')
+        if build_dir:
+            shutil.rmtree(build_dir, ignore_errors=True)
 
 def get_latested_from_csv(game_type):
     global logger
@@ -178,71 +289,271 @@ def get_latested_from_csv(game_type):
     if not os.path.exists(filepath):
         return None
     try:
-        with open(filepath, 'r') as f:
-            lines = f.readlines()
-            if len(lines) < 2:
-                return None
-            last_line = lines[-1].strip()
-            if not last_line:
-                last_line = lines[-2].strip()
-            _, start_time = last_line.split(',')
-            return datetime.strptime(start_time, '%Y-%m-%dT%H:%M:%S')
+        manifest = load_manifest(game_type)
+        if csv_entry_valid(manifest, filepath):
+            return manifest['csv']['watermark']
+        return csv_line_time(read_last_line(filepath))
     except Exception as e:
         logger.error(f"Error reading most recent time from CSV: {e}")
         return None
 
+def ensure_store(game_type, point_label):
+    global logger
+    csv_path = os.path.join(DATA_DIR, f'{game_type}_data.csv')
+    try:
+        if not store_exists(game_type) and os.path.exists(csv_path):
+            logger.info(f"Building {game_type} store from {csv_path}")
+            rows = import_csv_to_store(game_type, csv_path)
+            logger.info(f"Imported {rows} records into the {game_type} store")
+        elif store_exists(game_type) and not os.path.exists(csv_path):
+            rows = export_store_to_csv(game_type, point_label, csv_path)
+            logger.info(f"Exported {rows} records from the {game_type} store to {csv_path}")
+    except Exception as e:
+        logger.error(f"Error preparing {game_type} store: {e}")
+
 def insert_latest_csv(game_type, point_label, records):
     global logger
     logger.info("insert_latest_csv...")
     if records:
+        sorted_data = records.sorted()
+        previous_latest = get_store_latest(game_type)
+        try:
+            partitions = append_store(game_type, sorted_data)
+            logger.info(f"Appended {len(records)} new records to {partitions} {game_type} store partition(s)")
+        except Exception as e:
+            logger.error(f"Failed to append new data to store: {e}")
+        csv_file = os.path.join(DATA_DIR, f'{game_type}_data.csv')
+        manifest = load_manifest(game_type)
+        if previous_latest and sorted_data.times[0] < previous_latest:
+            try:
+                rows = export_store_to_csv(game_type, point_label, csv_file)
+                manifest['csv'] = scan_csv(csv_file)
+                save_manifest(game_type, manifest)
+                logger.info(f"Re-exported {rows} records to {csv_file} to keep it ordered")
+            except Exception as e:
+                logger.error(f"Failed to re-export CSV: {e}")
+            return
         try:
-            csv_file = os.path.join(DATA_DIR, f'{game_type}_data.csv')
-            with open(csv_file, 'a', newline='') as f:
-                writer = csv.writer(f)
-                if os.stat(csv_file).st_size == 0:
-                    writer.writerow([point_label, 'startTime'])
-                sorted_data = sorted(records.values(), key=lambda x: datetime.strptime(x['startTime'], '%m/%d/%Y %H:%M:%S'))
-                for record in sorted_data:
-                    writer.writerow([record[point_label], datetime.strptime(record['startTime'], '%m/%d/%Y %H:%M:%S').strftime('%Y-%m-%dT%H:%M:%S')])
+            if not csv_entry_valid(manifest, csv_file):
+                if os.path.exists(csv_file):
+                    logger.info(f"Manifest does not match {csv_file}, rescanning")
+                    manifest['csv'] = scan_csv(csv_file)
+                else:
+                    manifest['csv'] = None
+            buffer = io.StringIO(newline='')
+            writer = csv.writer(buffer)
+            if not manifest['csv'] or not manifest['csv']['size']:
+                writer.writerow([point_label, 'startTime'])
+            writer.writerows(zip(sorted_data.points, map(format_epoch, sorted_data.times)))
+            payload = buffer.getvalue().encode('utf-8')
+            with open(csv_file, 'ab') as f:
+                f.write(payload)
+            save_manifest(game_type, record_csv_append(manifest, payload, len(records), sorted_data.times[-1]))
             logger.info(f"Appended {len(records)} new records to {csv_file}")
         except Exception as e:
             logger.error(f"Failed to append new data to CSV: {e}")
 
 def analyze_high_points(game_type, point_label, threshold, all_data):
+    analyze_thresholds(game_type, point_label, [threshold], all_data)
+
+def analyze_thresholds(game_type, point_label, threshold_list, all_data):
+    global logger
+    logger.info(f"analyze_thresholds ({len(threshold_list)})...")
+    history = all_data.sorted()
+    ordered_thresholds = sorted(set(threshold_list))
+    analysis_state = load_analysis_state(game_type, point_label, ordered_thresholds, history)
+    if analysis_state is None:
+        logger.info(f"Rebuilding {game_type} threshold state from {len(history)} records")
+        analysis_state = sweep_thresholds(point_label, ordered_thresholds, history)
+        changed = set(ordered_thresholds)
+    else:
+        logger.info(f"Folding {len(history) - analysis_state['rows']} new {game_type} records into threshold state")
+        changed = fold_thresholds(point_label, ordered_thresholds, history, analysis_state)
+    for threshold in ordered_thresholds:
+        write_threshold_report(game_type, point_label, threshold, analysis_state['thresholds'][str(threshold)], len(history), threshold in changed)
+    save_analysis_state(game_type, analysis_state)
+
+def get_analysis_state_path(game_type):
+    return os.path.join(DATA_DIR, f'over_state_{game_type}.json')
+
+def load_analysis_state(game_type, point_label, ordered_thresholds, history):
+    global logger
+    state_path = get_analysis_state_path(game_type)
+    if not os.path.exists(state_path):
+        return None
+    try:
+        with open(state_path, 'r') as file:
+            analysis_state = json.load(file)
+    except Exception as e:
+        logger.error(f"Error loading threshold state: {e}")
+        return None
+    rows = analysis_state.get('rows', 0)
+    if analysis_state.get('point_label') != point_label or sorted(analysis_state.get('thresholds', {}), key=float) != [str(t) for t in ordered_thresholds]:
+        return None
+    if rows > len(history) or (rows and (history.times[rows - 1] != analysis_state['watermark'] or bisect_right(history.times, analysis_state['watermark']) != rows)):
+        return None
+    return analysis_state
+
+def save_analysis_state(game_type, analysis_state):
     global logger
-    logger.info("analyze_high_points...")
-    sorted_records = sorted(all_data.values(), key=lambda x: datetime.strptime(x['startTime'], '%Y-%m-%dT%H:%M:%S'), reverse=True)
-    results = []
-    previous_time = None
-    latest_index = None
-    for index, record in enumerate(sorted_records):
-        if record[point_label] > threshold:
-            start_time = datetime.strptime(record['startTime'], '%Y-%m-%dT%H:%M:%S')
-            if previous_time:
-                records_between = index - previous_index
-                time_since_previous = previous_time - start_time
-                results[-1]['records_since_previous'] = records_between
-                results[-1]['time_since_previous'] = str(time_since_previous)
+    state_path = get_analysis_state_path(game_type)
+    try:
+        with open(state_path + '.tmp', 'w') as file:
+            json.dump(analysis_state, file)
+        os.replace(state_path + '.tmp', state_path)
+    except Exception as e:
+        logger.error(f"Error saving threshold state: {e}")
+
+def sweep_thresholds(point_label, ordered_thresholds, history):
+    maxcount = 500
+    points = history.points
+    times = history.times
+    total_records = len(history)
+    states = [{'results': [], 'hits': 0, 'latest_index': None, 'latest_time': None} for _ in ordered_thresholds]
+    previous = [None] * len(ordered_thresholds)
+    for index in range(total_records):
+        position = total_records - 1 - index
+        point = points[position]
+        hit_count = bisect_left(ordered_thresholds, point)
+        if not hit_count:
+            continue
+        start_time = times[position]
+        for slot in range(hit_count):
+            state = states[slot]
+            results = state['results']
+            if previous[slot] is not None:
+                previous_index, previous_time = previous[slot]
+                time_since_previous = timedelta(seconds=previous_time - start_time)
+                if state['hits'] == len(results):
+                    results[-1]['records_since_previous'] = index - previous_index
+                    results[-1]['time_since_previous'] = str(time_since_previous)
             else:
                 time_since_previous = timedelta(0)
-            results.append({
-                point_label: record[point_label],
-                'startTime': record['startTime'],
-                'records_since_previous': 0,
-                'time_since_previous': str(time_since_previous)
+                state['latest_index'] = position
+                state['latest_time'] = start_time
+            if len(results) <= maxcount:
+                results.append({
+                    point_label: point,
+                    'startTime': format_epoch(start_time),
+                    'records_since_previous': 0,
+                    'time_since_previous': str(time_since_previous)
+                })
+            state['hits'] += 1
+            previous[slot] = (index, start_time)
+    return {
+        'point_label': point_label,
+        'rows': total_records,
+        'watermark': times[-1] if total_records else None,
+        'thresholds': {str(threshold): state for threshold, state in zip(ordered_thresholds, states)}
+    }
+
+def fold_thresholds(point_label, ordered_thresholds, history, analysis_state):
+    maxcount = 500
+    points = history.points
+    times = history.times
+    states = [analysis_state['thresholds'][str(threshold)] for threshold in ordered_thresholds]
+    changed = set()
+    for position in range(analysis_state['rows'], len(history)):
+        point = points[position]
+        hit_count = bisect_left(ordered_thresholds, point)
+        start_time = times[position]
+        for slot in range(hit_count):
+            state = states[slot]
+            results = state['results']
+            if state['hits']:
+                time_since_previous = str(timedelta(seconds=start_time - state['latest_time']))
+                records_since_previous = position - state['latest_index']
+                if state['hits'] == 1:
+                    results[0]['time_since_previous'] = time_since_previous
+            else:
+                time_since_previous = str(timedelta(0))
+                records_since_previous = 0
+            results.insert(0, {
+                point_label: point,
+                'startTime': format_epoch(start_time),
+                'records_since_previous': records_since_previous,
+                'time_since_previous': time_since_previous
             })
-            previous_index = index
-            previous_time = start_time
-            if latest_index is None:
-                latest_index = index
-    total_records = len(sorted_records)
-    latest_index = total_records - latest_index - 1 if latest_index is not None else 0
+            del results[maxcount + 1:]
+            state['hits'] += 1
+            state['latest_index'] = position
+            state['latest_time'] = start_time
+            changed.add(ordered_thresholds[slot])
+    analysis_state['rows'] = len(history)
+    if len(history):
+        analysis_state['watermark'] = times[-1]
+    return changed
+
+def analyze_thresholds_mysql(game_type, point_label, threshold_list):
+    global logger
+    logger.info(f"analyze_thresholds_mysql ({len(threshold_list)})...")
+    maxcount = 500
+    table_name = f"stake_{game_type}"
+    ordered_thresholds = sorted(set(threshold_list))
+    threshold_rows = " UNION ALL ".join(["SELECT %s AS threshold"] * len(ordered_thresholds))
+    gap_query = f"""
+        WITH ranked AS (
+            SELECT `{point_label}` AS point, start_time, ROW_NUMBER() OVER (ORDER BY start_time, identity_id) AS position
+            FROM `{table_name}`
+        ), hits AS (
+            SELECT levels.threshold, ranked.point, ranked.start_time, ranked.position,
+                LAG(ranked.position) OVER (PARTITION BY levels.threshold ORDER BY ranked.position) AS previous_position,
+                LAG(ranked.start_time) OVER (PARTITION BY levels.threshold ORDER BY ranked.position) AS previous_time,
+                ROW_NUMBER() OVER (PARTITION BY levels.threshold ORDER BY ranked.position DESC) AS recency,
+                COUNT(*) OVER (PARTITION BY levels.threshold) AS hit_count
+            FROM ranked JOIN ({threshold_rows}) AS levels ON ranked.point > levels.threshold
+        )
+        SELECT threshold, point, start_time, position, previous_position, previous_time, hit_count
+        FROM hits WHERE recency <= {maxcount + 1}
+        ORDER BY threshold, position DESC
+    """
+    try:
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM `{table_name}`")
+                total_records = cursor.fetchone()[0]
+                cursor.execute(gap_query, ordered_thresholds)
+                rows = cursor.fetchall()
+    except mysql.connector.Error as err:
+        logger.error(f"Error running threshold analysis in MySQL: {err}")
+        return
+    states = {threshold: {'results': [], 'hits': 0, 'latest_index': None, 'latest_time': None} for threshold in ordered_thresholds}
+    for threshold, point, start_time, position, previous_position, previous_time, hit_count in rows:
+        state = states[threshold]
+        results = state['results']
+        start_seconds = to_epoch(start_time)
+        if not results:
+            state['hits'] = hit_count
+            state['latest_index'] = position - 1
+            state['latest_time'] = start_seconds
+        if previous_position is not None:
+            records_since_previous = position - previous_position
+            time_since_previous = str(timedelta(seconds=start_seconds - to_epoch(previous_time)))
+        else:
+            records_since_previous = 0
+            time_since_previous = results[-1]['time_since_previous'] if results else str(timedelta(0))
+        results.append({
+            point_label: float(point),
+            'startTime': format_epoch(start_seconds),
+            'records_since_previous': records_since_previous,
+            'time_since_previous': time_since_previous
+        })
+    for threshold in ordered_thresholds:
+        write_threshold_report(game_type, point_label, threshold, states[threshold], total_records, True)
+
+def write_threshold_report(game_type, point_label, threshold, state, total_records, changed):
+    global logger
+    results = state['results']
     if results:
-        latest_time = datetime.strptime(results[0]['startTime'], '%Y-%m-%dT%H:%M:%S')
-        logger.info(f"High {game_type.capitalize()}points (>{threshold}): {len(results)} | RecordsSinceLatest: {total_records - latest_index} | TimeSinceLatest: {datetime.now() - latest_time}")
+        latest_time = from_epoch(state['latest_time'])
+        logger.info(f"High {game_type.capitalize()}points (>{threshold}): {state['hits']} | RecordsSinceLatest: {total_records - state['latest_index']} | TimeSinceLatest: {datetime.now() - latest_time}")
     else:
         logger.info(f"No records over threshold {threshold}")
 
+    output_file = os.path.join(DATA_DIR, f'over{threshold}{game_type}.json')
+    if not changed and os.path.exists(output_file):
+        return
+
     maxcount = 500
     counter = 0
     if results:
@@ -252,141 +563,304 @@ def analyze_high_points(game_type, point_label, threshold, all_data):
             if counter > maxcount:
                 break
 
-    output_file = os.path.join(DATA_DIR, f'over{threshold}{game_type}.json')
     with open(output_file, 'w') as file:
         json.dump(results[:500], file, indent=4)
 
-def adjust_time(gmt_time_str):
-    gmt_time = datetime.strptime(gmt_time_str, '%a, %d %b %Y %H:%M:%S %Z').replace(tzinfo=timezone.utc)
-    offset = timedelta(hours=4) if is_dst(gmt_time) else timedelta(hours=5)
-    return (gmt_time - offset).strftime('%m/%d/%Y %H:%M:%S')
-
-def is_dst(dt):
-    year = dt.year
-    dst_start = datetime(year, 3, 8, 2) + timedelta(days=(6 - datetime(year, 3, 8).weekday()))
-    dst_end = datetime(year, 11, 1, 2) + timedelta(days=(6 - datetime(year, 11, 1).weekday()))
-    return dst_start <= dt.replace(tzinfo=None) < dst_end
+def get_session_cookies(browser_driver, mode):
+    global logger
+    browser_driver.get(f'https://stake.us/casino/games/{mode}')
+    time.sleep(5)
+    cookies = browser_driver.get_cookies()
+    user_agent = browser_driver.execute_script("return navigator.userAgent;")
+    logger.info(f"Collected {len(cookies)} session cookies for {mode}")
+    return cookies, user_agent
 
-def run_stake_game(mode="CRASH",log=None):
+def close_browser(browser_driver, driver_service):
     global logger
-    logger = log
-    mode = mode.lower()
-    logger.info(f'Starting {mode} process...')
-    point_label = "crashpoint" if mode == "crash" else "slidepoint"
+    if browser_driver:
+        try:
+            browser_driver.quit()
+            logger.info("Browser session closed successfully.")
+        except Exception as e:
+            logger.error(f"Error while quitting driver: {e}")
+    if driver_service:
+        try:
+            driver_service.stop()
+            logger.info("Selenium service stopped successfully.")
+        except Exception as e:
+            logger.error(f"Error while stopping Selenium service: {e}")
+
+def get_history_query_builder(mode, limit):
     point_label_alt = "crashpoint" if mode == "crash" else "multiplier"
     query_outer_name = "crashGameList" if mode == "crash" else "slideList"
     query_name = "crashGameList" if mode == "crash" else "slideGameList"
-    browser_driver = setup_browser()
-    driver_service = browser_driver.service
-    new_data = {}
-    csv_latest = get_latested_from_csv(mode)
+    sinks = ['store', 'mysql'] if USE_DATABASE else ['store']
+    if VERIFY_HASH_CHAIN and mode == "crash":
+        sinks.append('hash')
+    fields = history_fields(point_label_alt, sinks)
+    return lru_cache(maxsize=None)(lambda offsets: build_history_query(query_outer_name, query_name, fields, offsets, limit))
+
+def fetch_new_rounds(clients, mode, latest_starttime, new_data):
+    global logger
+    limit = 50
+    if DEBUG_ENABLED:
+        logger.info(f"Checking {mode} data...")
+    pages, errors = fetch_history_pages(clients, get_history_query_builder(mode, limit), limit=limit, max_offset=900, rate=PAGE_RATE, burst=PAGE_BURST,
+                                        is_last_page=lambda game_list: any(parse_stake_time(game['startTime']) == latest_starttime for game in game_list),
+                                        pages_per_request=PAGES_PER_REQUEST)
+    for offset, error in errors:
+        logger.error(f"Error fetching {mode} page at offset {offset}: {error}")
+    auth_errors = [error for _, error in errors if isinstance(error, StakeClientError) and error.status in AUTH_STATUSES]
+    if auth_errors and not pages:
+        raise auth_errors[0]
+    logger.info(f"Fetched {len(pages)} {mode} page(s)")
+    reached = process_history_pages(pages, mode, latest_starttime, set(), new_data)
+    return reached or (bool(pages) and not pages[-1]), len(pages) * limit, bool(errors)
+
+def process_history_pages(pages, mode, latest_starttime, seen_ids, new_data):
+    global logger
+    point_label = "crashpoint" if mode == "crash" else "slidepoint"
+    if VERIFY_HASH_CHAIN and mode == "crash":
+        verify_history_pages(pages)
+    for game_list in pages:
+        if DEBUG_ENABLED:
+            logger.info(f"Fetched {mode} game data: {game_list}")
+        for game in game_list:
+            game_id = game['id']
+            if mode == "slide" and 'multiplier' in game:
+                game['slidepoint'] = game.pop('multiplier')
+            start_time = parse_stake_time(game['startTime'])
+            if latest_starttime and start_time == latest_starttime:
+                logger.info("Reached latest stored record.")
+                return True
+            if game_id not in seen_ids:
+                seen_ids.add(game_id)
+                new_data.append(game[point_label], start_time, game_id)
+    return False
+
+def verify_history_pages(pages):
+    global logger
+    games = [game for game_list in pages for game in game_list if game.get('hash') and game['hash'].get('hash')]
+    if not games:
+        return
+    hashes = [game['hash']['hash'] for game in games]
+    mismatches = verify_crashpoints(hashes, [game['crashpoint'] for game in games], VERIFY_PROCESSES)
+    broken_links = verify_chain_links(hashes)
+    for index in mismatches:
+        logger.warning(f"Crashpoint mismatch for round {games[index]['id']}: reported {games[index]['crashpoint']}")
+    for index in broken_links:
+        logger.warning(f"Hash chain break between rounds {games[index]['id']} and {games[index + 1]['id']}")
+    logger.info(f"Verified {len(games)} crash rounds against the hash chain | Mismatches: {len(mismatches)} | Chain breaks: {len(broken_links)}")
+
+def get_backfill_path(game_type):
+    return os.path.join(DATA_DIR, f'{game_type}_backfill.json')
+
+def get_backfill_store_dir(game_type):
+    return os.path.join(DATA_DIR, f'{game_type}_backfill')
+
+def load_backfill_checkpoint(game_type):
+    global logger
+    checkpoint_path = get_backfill_path(game_type)
+    if not os.path.exists(checkpoint_path):
+        return None
+    try:
+        with open(checkpoint_path, 'r') as file:
+            return json.load(file)
+    except Exception as e:
+        logger.error(f"Error loading backfill checkpoint: {e}")
+        return None
+
+def save_backfill_checkpoint(game_type, checkpoint):
+    checkpoint_path = get_backfill_path(game_type)
+    with open(checkpoint_path + '.tmp', 'w') as file:
+        json.dump(checkpoint, file)
+    os.replace(checkpoint_path + '.tmp', checkpoint_path)
+
+def clear_backfill(game_type):
+    checkpoint_path = get_backfill_path(game_type)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    shutil.rmtree(get_backfill_store_dir(game_type), ignore_errors=True)
+
+def start_backfill(mode, latest_starttime, start_offset):
+    checkpoint = load_backfill_checkpoint(mode) or {'watermark': latest_starttime, 'next_offset': start_offset, 'rows': 0}
+    checkpoint['next_offset'] = min(checkpoint['next_offset'], start_offset)
+    save_backfill_checkpoint(mode, checkpoint)
+
+def backfill_rounds(clients, mode, new_data):
+    global logger
+    limit = 50
+    chunk_size = BACKFILL_CHUNK_PAGES * limit
+    checkpoint = load_backfill_checkpoint(mode)
+    target = checkpoint['watermark']
+    backfill_dir = get_backfill_store_dir(mode)
+    seen_ids = set(new_data.round_ids())
+    seen_ids.update(load_store(mode, backfill_dir).round_ids())
+    build_query = get_history_query_builder(mode, limit)
+    logger.info(f"Backfilling {mode} from offset {checkpoint['next_offset']} back to {format_epoch(target)}...")
+    reached = False
+    while not reached and checkpoint['next_offset'] < BACKFILL_MAX_OFFSET:
+        start_offset = checkpoint['next_offset']
+        pages, errors = fetch_history_pages(clients, build_query, limit=limit, max_offset=start_offset + chunk_size, rate=PAGE_RATE, burst=PAGE_BURST,
+                                            is_last_page=lambda game_list: any(parse_stake_time(game['startTime']) <= target for game in game_list),
+                                            pages_per_request=PAGES_PER_REQUEST, start_offset=start_offset)
+        if errors:
+            for offset, error in errors:
+                logger.error(f"Error fetching {mode} backfill page at offset {offset}: {error}")
+        chunk = RoundHistory()
+        reached = process_history_pages(pages, mode, target, seen_ids, chunk)
+        if len(chunk) and min(chunk.times) <= target:
+            reached = True
+            chunk = chunk.take([index for index, seconds in enumerate(chunk.times) if seconds > target])
+        if pages and not pages[-1]:
+            reached = True
+        append_store(mode, chunk, backfill_dir)
+        checkpoint['next_offset'] = start_offset + len(pages) * limit
+        checkpoint['rows'] += len(chunk)
+        save_backfill_checkpoint(mode, checkpoint)
+        logger.info(f"Backfill checkpoint: offset {checkpoint['next_offset']} | {checkpoint['rows']} records")
+        if errors and not reached:
+            return None
+    if not reached:
+        logger.warning(f"Backfill stopped at offset limit {BACKFILL_MAX_OFFSET} before reaching {format_epoch(target)}")
+    return load_store(mode, backfill_dir)
+
+def prepare_game(mode, point_label):
+    global logger
+    db_latest = None
     if USE_DATABASE:
         ensure_table_exists(mode, point_label)
+        recover_db_pending(mode, point_label)
         db_latest = get_latest_from_mysql(mode)
         csv_path = os.path.join(DATA_DIR, f'{mode}_data.csv')
-        if not os.path.exists(csv_path) and db_latest:
+        if not os.path.exists(csv_path) and not store_exists(mode) and db_latest:
             export_mysql_to_csv(mode, point_label)
-        latest_starttime = csv_latest if csv_latest and (db_latest is None or csv_latest >= db_latest) else db_latest or csv_latest
-    else:
-        latest_starttime = csv_latest
-    if latest_starttime is None:
-        latest_starttime = datetime(1970, 1, 1)
-    latest_starttime = latest_starttime.strftime('%m/%d/%Y %H:%M:%S')
-    logger.info(f"Most recent StartTime in database: {latest_starttime}")
+    ensure_store(mode, point_label)
+    stored_latest = get_store_latest(mode) or get_latested_from_csv(mode)
+    latest_starttime = max(stored_latest or 0, db_latest or 0)
+    logger.info(f"Most recent StartTime in database: {format_epoch(latest_starttime)}")
+    return latest_starttime
+
+def recover_db_pending(game_type, point_label):
+    global logger
+    pending = load_manifest(game_type)['db_pending']
+    if not pending:
+        return
+    logger.warning(f"Previous run stopped before {pending['rows']} {game_type} records from {format_epoch(pending['from'])} to {format_epoch(pending['to'])} reached MySQL, replaying them from the store")
+    records = load_store_range(game_type, pending['from'], pending['to'])
+    if insert_latest_mysql(game_type, point_label, records) is not None:
+        save_manifest(game_type, clear_db_pending(load_manifest(game_type), pending['to']))
+
+def open_clients(browser_driver, cookies, user_agent):
+    if USE_HTTP_CLIENT:
+        return [StakeGraphQLClient(cookies, user_agent=user_agent) for _ in range(MAX_IN_FLIGHT)]
+    return [BrowserGraphQLClient(browser_driver, cookies)]
+
+def collect_rounds(clients, mode, latest_starttime, new_data):
+    global logger
+    fetched = RoundHistory()
+    reached, fetched_offset, failed = fetch_new_rounds(clients, mode, latest_starttime, fetched)
+    if not reached and not fetched_offset:
+        logger.error(f"No {mode} pages fetched, skipping this run")
+        return False
+    if BACKFILL_ENABLED and latest_starttime and (not reached or load_backfill_checkpoint(mode)):
+        if reached:
+            new_data.extend(fetched)
+        else:
+            logger.warning(f"Gap detected between {format_epoch(latest_starttime)} and {mode} offset {fetched_offset}")
+            start_backfill(mode, latest_starttime, fetched_offset)
+            save_rounds(mode, "crashpoint" if mode == "crash" else "slidepoint", fetched, False)
+        backfilled = backfill_rounds(clients, mode, fetched)
+        if backfilled is not None:
+            new_data.extend(backfilled)
+            return True
+        return False
+    if failed and not reached and latest_starttime:
+        logger.error(f"Discarding {len(fetched)} {mode} records fetched before the failed page so the watermark stays at {format_epoch(latest_starttime)}")
+        return False
+    new_data.extend(fetched)
+    return False
+
+def save_rounds(mode, point_label, new_data, backfill_done):
+    if len(new_data):
+        earlier_pending = None
+        if USE_DATABASE:
+            recover_db_pending(mode, point_label)
+            manifest = load_manifest(mode)
+            earlier_pending = manifest['db_pending']
+            save_manifest(mode, mark_db_pending(manifest, min(new_data.times), max(new_data.times), len(new_data)))
+        insert_latest_csv(mode, point_label, new_data)
+        if USE_DATABASE and insert_latest_mysql(mode, point_label, new_data) is not None and not earlier_pending:
+            save_manifest(mode, clear_db_pending(load_manifest(mode), new_data.latest()))
+    if backfill_done:
+        clear_backfill(mode)
+
+def update_stats(game_type, point_label, new_data):
+    global logger
     try:
-        with browser_driver as driver:
-            driver.get(f'https://stake.us/casino/games/{mode}')
-            time.sleep(5)
-            if DEBUG_ENABLED:
-                logger.info(f"Checking {mode} data...")
-            cookies = browser_driver.get_cookies()
-            cookie_str = '; '.join([f"{cookie['name']}={cookie['value']}" for cookie in cookies])
-            escaped_cookie_str = cookie_str.replace('"', '\\"')
-            offset = 0
-            limit = 50
-            while offset < 900:
-                query = f"""
-                    query {query_outer_name}History($limit: Int, $offset: Int) {{
-                        {query_name}(limit: $limit, offset: $offset) {{
-                            id
-                            startTime
-                            {point_label_alt}
-                            hash {{ 
-                                id 
-                                hash 
-                                __typename 
-                            }}
-                            __typename
-                        }}
-                    }}
-                """
-                script = f"""
-                    return fetch("https://stake.us/_api/graphql", {{
-                        method: "POST",
-                        headers: {{
-                            "Content-Type": "application/json",
-                            "Accept": "application/graphql+json, application/json",
-                            "Cookie": "{escaped_cookie_str}"
-                        }},
-                        body: JSON.stringify({{
-                            query: `{query}`,
-                            variables: {{
-                                "limit": {limit},
-                                "offset": {offset}
-                            }}
-                        }})
-                    }}).then(response => response.json());
-                """
-                if DEBUG_ENABLED:
-                    logger.info(f"Script -> {script}")
-                response_data = browser_driver.execute_script(script)
-                if DEBUG_ENABLED:
-                    logger.info(f"Fetched {mode} game data: {response_data}")
-                game_list = response_data['data'][query_name]
-                if not game_list:
-                    break
-                for game in game_list:
-                    game_id = game['id']
-                    if mode == "slide" and 'multiplier' in game:
-                        game['slidepoint'] = game.pop('multiplier')
-                    game['startTime'] = datetime.strptime(adjust_time(game['startTime']), '%m/%d/%Y %H:%M:%S').strftime('%m/%d/%Y %H:%M:%S')
-                    gameStartTime = game['startTime']
-                    if latest_starttime and gameStartTime == latest_starttime:
-                        logger.info("Reached latest stored record.")
-                        break
-                    new_data[game_id] = game
-                if gameStartTime == latest_starttime:
-                    break
-                offset += limit
-                time.sleep(random.uniform(1, 3))
-    except KeyboardInterrupt:
-        if DEBUG_ENABLED:
-            logger.info("Monitoring stopped by user")
-        if browser_driver:
-            browser_driver.quit()
-            logger.info("Browser session closed on user interrupt.")
+        stats = load_stats(game_type, point_label, thresholds)
+        fresh = new_data.sorted()
+        rows = count_store_rows(game_type)
+        if stats and stats['watermark'] is not None and (not len(fresh) or fresh.times[0] > stats['watermark']) and stats['rows'] + len(fresh) == rows:
+            if not len(fresh):
+                return stats
+            fold_stats(stats, fresh)
+        else:
+            logger.info(f"Rebuilding {game_type} stats from {rows} stored records")
+            stats = rebuild_stats(game_type, point_label, thresholds)
+        save_stats(game_type, stats)
+        log_stats(game_type, stats)
+        return stats
     except Exception as e:
-        logger.error(f"Error in main monitoring loop: {e}")
-    finally:
-        if browser_driver:
-            try:
-                browser_driver.quit()
-                logger.info("Browser session closed successfully.")
-            except Exception as e:
-                logger.error(f"Error while quitting driver: {e}")
-        if driver_service:
-            try:
-                driver_service.stop()
-                logger.info("Selenium service stopped successfully.")
-            except Exception as e:
-                logger.error(f"Error while stopping Selenium service: {e}")
-    if new_data:
-        insert_latest_csv(mode, point_label, new_data)
-        if USE_DATABASE:
-            insert_latest_mysql(mode, point_label, new_data)
-    all_data = load_existing_data(mode, point_label)
-    for threshold in thresholds:
-        analyze_high_points(mode, point_label, threshold, all_data)
+        logger.error(f"Error updating {game_type} stats: {e}")
+        return None
+
+def log_stats(game_type, stats):
+    global logger
+    if not stats['rows']:
+        return
+    quantiles = ' | '.join(f"p{quantile * 100:g}: {sketch_quantile(stats['sketch'], quantile):.2f}" for quantile in QUANTILES)
+    logger.info(f"{game_type.capitalize()} stats: Rounds: {stats['rows']} | Mean: {stats['total'] / stats['rows']:.2f} | {quantiles} | Max: {stats['max']}")
+    for level, streak in stats['streaks'].items():
+        logger.info(f"Streaks around {level}: Longest <= {streak['max_below']} | Longest > {streak['max_above']} | Current <= {streak['below']} | Current > {streak['above']}")
+    for label, window in window_rates(stats).items():
+        if window['rounds']:
+            rates = ' | '.join(f">{level}: {hits / window['rounds']:.2%}" for level, hits in window['hits'].items())
+            logger.info(f"Hit rates ({label}, {window['rounds']} rounds): {rates}")
+
+def run_analysis(mode, point_label, all_data=None):
+    if USE_DATABASE and SQL_ANALYSIS:
+        analyze_thresholds_mysql(mode, point_label, thresholds)
+        return None
+    if all_data is None:
+        all_data = load_existing_data(mode, point_label)
+    analyze_thresholds(mode, point_label, thresholds, all_data)
+    return all_data
+
+def collect_game(clients, mode, latest_starttime, new_data):
+    global logger
+    try:
+        return collect_rounds(clients, mode, latest_starttime, new_data)
+    except Exception as e:
+        logger.error(f"Error collecting {mode}: {e}")
+        return False
+
+def analyze_game_process(mode, point_label):
+    global logger
+    handler = BufferingHandler(sys.maxsize)
+    logger = logging.getLogger(f"stake_{mode}_analysis")
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    detach_pool()
+    try:
+        run_analysis(mode, point_label)
+    except Exception as e:
+        logger.error(f"Error analyzing {mode}: {e}")
+    return [(record.levelno, record.getMessage()) for record in handler.buffer]
+
+def remove_driver_log():
+    global logger
     log_path = os.path.join(os.getcwd(), "geckodriver.log")
     if os.path.exists(log_path):
         try:
@@ -395,4 +869,161 @@ def run_stake_game(mode="CRASH",log=None):
                 logger.info("Deleted geckodriver.log")
         except Exception as e:
             logger.error(f"Failed to delete geckodriver.log: {e}")
+
+def run_stake_game(mode="CRASH",log=None):
+    global logger
+    logger = log
+    mode = mode.lower()
+    logger.info(f'Starting {mode} process...')
+    point_label = "crashpoint" if mode == "crash" else "slidepoint"
+    browser_driver = setup_browser()
+    driver_service = browser_driver.service
+    new_data = RoundHistory()
+    latest_starttime = prepare_game(mode, point_label)
+    backfill_done = False
+    clients = []
+    try:
+        cookies, user_agent = get_session_cookies(browser_driver, mode)
+        clients = open_clients(browser_driver, cookies, user_agent)
+        if USE_HTTP_CLIENT:
+            close_browser(browser_driver, driver_service)
+            browser_driver = driver_service = None
+        backfill_done = collect_rounds(clients, mode, latest_starttime, new_data)
+    except KeyboardInterrupt:
+        if DEBUG_ENABLED:
+            logger.info("Monitoring stopped by user")
+    except Exception as e:
+        logger.error(f"Error in main monitoring loop: {e}")
+    finally:
+        for client in clients:
+            client.close()
+        close_browser(browser_driver, driver_service)
+    save_rounds(mode, point_label, new_data, backfill_done)
+    if STATS_ENABLED:
+        update_stats(mode, point_label, new_data)
+    run_analysis(mode, point_label)
+    remove_driver_log()
     logger.info(f'Stopping {mode} process...')
+
+def run_stake_games(modes=("CRASH", "SLIDE"), log=None):
+    global logger
+    logger = log
+    modes = [mode.lower() for mode in modes]
+    logger.info(f"Starting {' and '.join(modes)} processes...")
+    point_labels = {mode: "crashpoint" if mode == "crash" else "slidepoint" for mode in modes}
+    browser_driver = setup_browser()
+    driver_service = browser_driver.service
+    latest_starttimes = {mode: prepare_game(mode, point_labels[mode]) for mode in modes}
+    new_data = {mode: RoundHistory() for mode in modes}
+    backfill_done = {mode: False for mode in modes}
+    clients = {}
+    try:
+        cookies, user_agent = get_session_cookies(browser_driver, modes[0])
+        for mode in modes:
+            clients[mode] = open_clients(browser_driver, cookies, user_agent)
+        if USE_HTTP_CLIENT:
+            close_browser(browser_driver, driver_service)
+            browser_driver = driver_service = None
+        with ThreadPoolExecutor(max_workers=len(modes) if USE_HTTP_CLIENT else 1) as executor:
+            futures = {mode: executor.submit(collect_game, clients[mode], mode, latest_starttimes[mode], new_data[mode]) for mode in modes}
+            for mode, future in futures.items():
+                backfill_done[mode] = future.result()
+    except KeyboardInterrupt:
+        if DEBUG_ENABLED:
+            logger.info("Monitoring stopped by user")
+    except Exception as e:
+        logger.error(f"Error in main monitoring loop: {e}")
+    finally:
+        for mode_clients in clients.values():
+            for client in mode_clients:
+                client.close()
+        close_browser(browser_driver, driver_service)
+    for mode in modes:
+        save_rounds(mode, point_labels[mode], new_data[mode], backfill_done[mode])
+        if STATS_ENABLED:
+            update_stats(mode, point_labels[mode], new_data[mode])
+    with ProcessPoolExecutor(max_workers=min(ANALYSIS_PROCESSES, len(modes))) as executor:
+        futures = {mode: executor.submit(analyze_game_process, mode, point_labels[mode]) for mode in modes}
+        for mode, future in futures.items():
+            try:
+                for level, message in future.result():
+                    logger.log(level, message)
+            except Exception as e:
+                logger.error(f"Error analyzing {mode}: {e}")
+    remove_driver_log()
+    logger.info(f"Stopping {' and '.join(modes)} processes...")
+
+def cookies_expiring(cookies, margin=COOKIE_REFRESH_MARGIN):
+    expiries = [cookie['expiry'] for cookie in cookies if cookie['name'] in SESSION_COOKIES and cookie.get('expiry')]
+    return bool(expiries) and min(expiries) <= time.time() + margin
+
+def refresh_session(browser_driver, mode, clients):
+    cookies, _ = get_session_cookies(browser_driver, mode)
+    for client in clients:
+        client.set_cookies(cookies)
+    return cookies
+
+def poll_stake_game(browser_driver, clients, session, mode, game_state):
+    global logger
+    point_label = "crashpoint" if mode == "crash" else "slidepoint"
+    new_data = RoundHistory()
+    backfill_done = False
+    try:
+        try:
+            backfill_done = collect_rounds(clients, mode, game_state['latest'], new_data)
+        except StakeClientError as e:
+            if e.status not in AUTH_STATUSES or len(new_data):
+                raise
+            logger.warning(f"Session rejected with HTTP {e.status}, refreshing cookies...")
+            session['cookies'] = refresh_session(browser_driver, mode, clients)
+            backfill_done = collect_rounds(clients, mode, game_state['latest'], new_data)
+    except Exception as e:
+        logger.error(f"Error polling {mode}: {e}")
+    if not len(new_data) and game_state['analyzed']:
+        return
+    save_rounds(mode, point_label, new_data, backfill_done)
+    if STATS_ENABLED:
+        update_stats(mode, point_label, new_data)
+    history = game_state['history']
+    store_latest = get_store_latest(mode)
+    if history is not None and len(new_data) and not backfill_done and load_backfill_checkpoint(mode) is None and new_data.latest() == store_latest and (not len(history) or min(new_data.times) > history.times[-1]):
+        history.extend(new_data.sorted())
+    else:
+        history = None
+    game_state['history'] = run_analysis(mode, point_label, history)
+    game_state['latest'] = max(game_state['latest'], store_latest or 0)
+    game_state['analyzed'] = True
+
+def run_stake_daemon(modes=("CRASH",), interval=DAEMON_INTERVAL, log=None):
+    global logger
+    logger = log
+    modes = [mode.lower() for mode in modes]
+    logger.info(f"Starting stake daemon for {', '.join(modes)} every {interval}s...")
+    games = {}
+    for mode in modes:
+        games[mode] = {'latest': prepare_game(mode, "crashpoint" if mode == "crash" else "slidepoint"), 'history': None, 'analyzed': False}
+    browser_driver = setup_browser()
+    driver_service = browser_driver.service
+    clients = []
+    try:
+        cookies, user_agent = get_session_cookies(browser_driver, modes[0])
+        session = {'cookies': cookies}
+        clients = open_clients(browser_driver, cookies, user_agent)
+        while True:
+            started = time.monotonic()
+            if cookies_expiring(session['cookies']):
+                logger.info("Session cookies expiring, refreshing...")
+                session['cookies'] = refresh_session(browser_driver, modes[0], clients)
+            for mode in modes:
+                poll_stake_game(browser_driver, clients, session, mode, games[mode])
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        logger.info("Stake daemon stopped by user")
+    except Exception as e:
+        logger.error(f"Error in stake daemon loop: {e}")
+    finally:
+        for client in clients:
+            client.close()
+        close_browser(browser_driver, driver_service)
+        remove_driver_log()
+    logger.info("Stopping stake daemon...")
@@ -0,0 +1,154 @@
+import json
+import math
+import os
+from bisect import bisect_left
+from projects.stake.stake_store import DATA_DIR, list_partitions, load_partition
+
+SKETCH_ALPHA = 0.01
+STREAK_LEVELS = (2, 10, 100, 1000)
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+WINDOWS = (('1h', 3600), ('24h', 86400), ('7d', 604800))
+BUCKET_SECONDS = 3600
+
+
+def get_stats_path(game_type):
+    return os.path.join(DATA_DIR, f'{game_type}_stats.json')
+
+def sketch_gamma(alpha):
+    return (1 + alpha) / (1 - alpha)
+
+def new_sketch(alpha=SKETCH_ALPHA):
+    return {'alpha': alpha, 'zero': 0, 'bins': {}}
+
+def merge_sketch(target, other):
+    if target['alpha'] != other['alpha']:
+        raise ValueError("cannot merge sketches with different accuracy")
+    target['zero'] += other['zero']
+    bins = target['bins']
+    for key, count in other['bins'].items():
+        bins[key] = bins.get(key, 0) + count
+    return target
+
+def sketch_quantile(sketch, quantile):
+    total = sketch['zero'] + sum(sketch['bins'].values())
+    if not total:
+        return None
+    rank = quantile * (total - 1)
+    seen = sketch['zero']
+    if rank < seen:
+        return 0.0
+    gamma = sketch_gamma(sketch['alpha'])
+    for key in sorted(sketch['bins']):
+        seen += sketch['bins'][key]
+        if rank < seen:
+            return 2 * gamma ** key / (gamma + 1)
+    return 2 * gamma ** max(sketch['bins']) / (gamma + 1)
+
+def new_stats(point_label, threshold_list):
+    return {
+        'point_label': point_label,
+        'rows': 0,
+        'watermark': None,
+        'total': 0.0,
+        'min': None,
+        'max': None,
+        'sketch': new_sketch(),
+        'histogram': {'thresholds': sorted(threshold_list), 'counts': [0] * (len(threshold_list) + 1)},
+        'streaks': {str(level): {'below': 0, 'above': 0, 'max_below': 0, 'max_above': 0} for level in STREAK_LEVELS},
+        'windows': {}
+    }
+
+def fold_stats(stats, rounds):
+    if not len(rounds):
+        return stats
+    sketch = stats['sketch']
+    bins = sketch['bins']
+    log_gamma = math.log(sketch_gamma(sketch['alpha']))
+    thresholds = stats['histogram']['thresholds']
+    counts = stats['histogram']['counts']
+    levels = [float(level) for level in stats['streaks']]
+    streaks = list(stats['streaks'].values())
+    below = [streak['below'] for streak in streaks]
+    above = [streak['above'] for streak in streaks]
+    max_below = [streak['max_below'] for streak in streaks]
+    max_above = [streak['max_above'] for streak in streaks]
+    windows = stats['windows']
+    width = len(levels) + 1
+    zero = 0
+    for point, seconds in zip(rounds.points, rounds.times):
+        if point > 0:
+            key = math.ceil(math.log(point) / log_gamma)
+            bins[key] = bins.get(key, 0) + 1
+        else:
+            zero += 1
+        counts[bisect_left(thresholds, point)] += 1
+        bucket_start = seconds - seconds % BUCKET_SECONDS
+        bucket = windows.get(bucket_start)
+        if bucket is None:
+            bucket = windows[bucket_start] = [0] * width
+        bucket[0] += 1
+        for index, level in enumerate(levels):
+            if point > level:
+                bucket[index + 1] += 1
+                above[index] += 1
+                below[index] = 0
+                if above[index] > max_above[index]:
+                    max_above[index] = above[index]
+            else:
+                below[index] += 1
+                above[index] = 0
+                if below[index] > max_below[index]:
+                    max_below[index] = below[index]
+    sketch['zero'] += zero
+    for index, streak in enumerate(streaks):
+        streak.update(below=below[index], above=above[index], max_below=max_below[index], max_above=max_above[index])
+    low = min(rounds.points)
+    high = max(rounds.points)
+    stats['min'] = low if stats['min'] is None else min(stats['min'], low)
+    stats['max'] = high if stats['max'] is None else max(stats['max'], high)
+    stats['total'] += sum(rounds.points)
+    stats['rows'] += len(rounds)
+    stats['watermark'] = max(stats['watermark'] or 0, rounds.times[-1])
+    horizon = stats['watermark'] - max(seconds for _, seconds in WINDOWS)
+    for bucket_start in [bucket_start for bucket_start in windows if bucket_start + BUCKET_SECONDS <= horizon]:
+        del windows[bucket_start]
+    return stats
+
+def rebuild_stats(game_type, point_label, threshold_list):
+    stats = new_stats(point_label, threshold_list)
+    for name in list_partitions(game_type):
+        fold_stats(stats, load_partition(game_type, name).sorted())
+    return stats
+
+def window_rates(stats):
+    rates = {}
+    if stats['watermark'] is None:
+        return rates
+    for label, seconds in WINDOWS:
+        start = stats['watermark'] - seconds
+        totals = [0] * (len(STREAK_LEVELS) + 1)
+        for bucket_start, bucket in stats['windows'].items():
+            if bucket_start + BUCKET_SECONDS > start:
+                totals = [total + count for total, count in zip(totals, bucket)]
+        rates[label] = {'rounds': totals[0], 'hits': dict(zip(stats['streaks'], totals[1:]))}
+    return rates
+
+def load_stats(game_type, point_label, threshold_list):
+    stats_path = get_stats_path(game_type)
+    if not os.path.exists(stats_path):
+        return None
+    with open(stats_path, 'r') as file:
+        stats = json.load(file)
+    if stats.get('point_label') != point_label or stats['histogram']['thresholds'] != sorted(threshold_list):
+        return None
+    if list(stats['streaks']) != [str(level) for level in STREAK_LEVELS] or stats['sketch']['alpha'] != SKETCH_ALPHA:
+        return None
+    stats['sketch']['bins'] = {int(key): count for key, count in stats['sketch']['bins'].items()}
+    stats['windows'] = {int(key): bucket for key, bucket in stats['windows'].items()}
+    return stats
+
+def save_stats(game_type, stats):
+    stats_path = get_stats_path(game_type)
+    with open(stats_path + '.tmp', 'w') as file:
+        json.dump(stats, file)
+    os.replace(stats_path + '.tmp', stats_path)
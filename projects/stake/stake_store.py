@@ -0,0 +1,213 @@
+import csv
+import os
+import re
+import shutil
+import time
+from array import array
+from projects.stake.stake_rounds import ID_SIZE, RoundHistory, format_epoch, parse_iso_epoch
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+POINT_COLUMN = 'point.bin'
+TIME_COLUMN = 'time.bin'
+ID_COLUMN = 'id.bin'
+PARTITION_PATTERN = re.compile(r'\d{4}-\d{2}')
+
+
+def partition_key(seconds):
+    tm = time.gmtime(seconds)
+    return f"{tm.tm_year:04d}-{tm.tm_mon:02d}"
+
+def get_store_dir(game_type):
+    return os.path.join(DATA_DIR, f'{game_type}_store')
+
+def store_exists(game_type):
+    return bool(list_partitions(game_type))
+
+def list_partitions(game_type, store_dir=None):
+    store_dir = store_dir or get_store_dir(game_type)
+    if not os.path.isdir(store_dir):
+        return []
+    return sorted(name for name in os.listdir(store_dir) if PARTITION_PATTERN.fullmatch(name) and os.path.exists(os.path.join(store_dir, name, TIME_COLUMN)))
+
+def read_column(path, typecode):
+    column = array(typecode)
+    if os.path.exists(path):
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            column.fromfile(f, size // column.itemsize)
+    return column
+
+def count_store_rows(game_type, store_dir=None):
+    store_dir = store_dir or get_store_dir(game_type)
+    itemsize = array('q').itemsize
+    return sum(os.path.getsize(os.path.join(store_dir, name, TIME_COLUMN)) // itemsize for name in list_partitions(game_type, store_dir))
+
+def load_partition(game_type, name, store_dir=None):
+    partition_dir = os.path.join(store_dir or get_store_dir(game_type), name)
+    points = read_column(os.path.join(partition_dir, POINT_COLUMN), 'd')
+    times = read_column(os.path.join(partition_dir, TIME_COLUMN), 'q')
+    id_path = os.path.join(partition_dir, ID_COLUMN)
+    ids = bytearray()
+    if os.path.exists(id_path):
+        with open(id_path, 'rb') as f:
+            ids = bytearray(f.read())
+    rows = min(len(points), len(times))
+    del points[rows:]
+    del times[rows:]
+    del ids[rows * ID_SIZE:]
+    ids += bytes(rows * ID_SIZE - len(ids))
+    return RoundHistory(points, times, ids)
+
+def load_store(game_type, store_dir=None):
+    history = RoundHistory()
+    for name in list_partitions(game_type, store_dir):
+        history.extend(load_partition(game_type, name, store_dir))
+    return history
+
+def load_store_range(game_type, first_time, last_time, store_dir=None):
+    history = RoundHistory()
+    first_key = partition_key(first_time)
+    last_key = partition_key(last_time)
+    for name in list_partitions(game_type, store_dir):
+        if first_key <= name <= last_key:
+            partition = load_partition(game_type, name, store_dir)
+            history.extend(partition.take([index for index, seconds in enumerate(partition.times) if first_time <= seconds <= last_time]))
+    return history
+
+def get_store_latest(game_type):
+    partitions = list_partitions(game_type)
+    if not partitions:
+        return None
+    return get_partition_latest(os.path.join(get_store_dir(game_type), partitions[-1]))
+
+def get_partition_latest(partition_dir):
+    time_path = os.path.join(partition_dir, TIME_COLUMN)
+    itemsize = array('q').itemsize
+    size = os.path.getsize(time_path) if os.path.exists(time_path) else 0
+    if size < itemsize:
+        return None
+    latest = array('q')
+    with open(time_path, 'rb') as f:
+        f.seek(size - size % itemsize - itemsize)
+        latest.fromfile(f, 1)
+    return latest[0]
+
+def write_partition(partition_dir, rounds):
+    build_dir = partition_dir + '.tmp'
+    old_dir = partition_dir + '.old'
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+    with open(os.path.join(build_dir, ID_COLUMN), 'wb') as f:
+        f.write(rounds.ids)
+    with open(os.path.join(build_dir, POINT_COLUMN), 'wb') as f:
+        rounds.points.tofile(f)
+    with open(os.path.join(build_dir, TIME_COLUMN), 'wb') as f:
+        rounds.times.tofile(f)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.isdir(partition_dir):
+        os.replace(partition_dir, old_dir)
+    os.replace(build_dir, partition_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+def repair_partition(partition_dir):
+    point_path = os.path.join(partition_dir, POINT_COLUMN)
+    time_path = os.path.join(partition_dir, TIME_COLUMN)
+    id_path = os.path.join(partition_dir, ID_COLUMN)
+    if not os.path.exists(time_path):
+        return
+    point_size = os.path.getsize(point_path) if os.path.exists(point_path) else 0
+    rows = min(point_size // array('d').itemsize, os.path.getsize(time_path) // array('q').itemsize)
+    for path, size in ((point_path, rows * array('d').itemsize), (time_path, rows * array('q').itemsize), (id_path, rows * ID_SIZE)):
+        current = os.path.getsize(path) if os.path.exists(path) else 0
+        if current > size:
+            os.truncate(path, size)
+        elif current < size:
+            with open(path, 'ab') as f:
+                f.write(bytes(size - current))
+
+def merge_partition(game_type, store_dir, key, batch):
+    existing = load_partition(game_type, key, store_dir)
+    known_ids = {bytes(existing.ids[i:i + ID_SIZE]) for i in range(0, len(existing.ids), ID_SIZE)}
+    known_ids.discard(bytes(ID_SIZE))
+    for index in range(len(batch)):
+        round_id = bytes(batch.ids[index * ID_SIZE:(index + 1) * ID_SIZE])
+        if round_id not in known_ids:
+            existing.points.append(batch.points[index])
+            existing.times.append(batch.times[index])
+            existing.ids += round_id
+    write_partition(os.path.join(store_dir, key), existing.sorted())
+
+def append_store(game_type, rounds, store_dir=None):
+    store_dir = store_dir or get_store_dir(game_type)
+    rounds = rounds.sorted()
+    batches = {}
+    for index, seconds in enumerate(rounds.times):
+        key = partition_key(seconds)
+        if key not in batches:
+            batches[key] = RoundHistory()
+        batch = batches[key]
+        batch.points.append(rounds.points[index])
+        batch.times.append(seconds)
+        batch.ids += rounds.ids[index * ID_SIZE:(index + 1) * ID_SIZE]
+    for key, batch in batches.items():
+        partition_dir = os.path.join(store_dir, key)
+        repair_partition(partition_dir)
+        partition_latest = get_partition_latest(partition_dir)
+        if partition_latest is not None and batch.times[0] < partition_latest:
+            merge_partition(game_type, store_dir, key, batch)
+            continue
+        os.makedirs(partition_dir, exist_ok=True)
+        with open(os.path.join(partition_dir, ID_COLUMN), 'ab') as f:
+            f.write(batch.ids)
+        with open(os.path.join(partition_dir, POINT_COLUMN), 'ab') as f:
+            batch.points.tofile(f)
+        with open(os.path.join(partition_dir, TIME_COLUMN), 'ab') as f:
+            batch.times.tofile(f)
+    return len(batches)
+
+def begin_store_build(game_type):
+    build_dir = get_store_dir(game_type) + '.tmp'
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+    return build_dir
+
+def finish_store_build(game_type, build_dir):
+    store_dir = get_store_dir(game_type)
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(build_dir, store_dir)
+
+def import_csv_to_store(game_type, csv_path, batch_size=100000):
+    build_dir = begin_store_build(game_type)
+    rows = 0
+    batch = RoundHistory()
+    with open(csv_path, 'r', newline='') as file:
+        csv_reader = csv.reader(file)
+        next(csv_reader, None)
+        for row in csv_reader:
+            if not row:
+                continue
+            point, start_time = row
+            batch.append(float(point), parse_iso_epoch(start_time))
+            if len(batch) >= batch_size:
+                append_store(game_type, batch, build_dir)
+                rows += len(batch)
+                batch = RoundHistory()
+    if len(batch):
+        append_store(game_type, batch, build_dir)
+        rows += len(batch)
+    finish_store_build(game_type, build_dir)
+    return rows
+
+def export_store_to_csv(game_type, point_label, output_file):
+    rows = 0
+    with open(output_file + '.tmp', 'w', newline='') as csvfile:
+        csv_writer = csv.writer(csvfile)
+        csv_writer.writerow([point_label, 'startTime'])
+        for name in list_partitions(game_type):
+            partition = load_partition(game_type, name)
+            csv_writer.writerows(zip(partition.points, map(format_epoch, partition.times)))
+            rows += len(partition)
+    os.replace(output_file + '.tmp', output_file)
+    return rows